@@ -3,9 +3,16 @@
 # Getting banned, warned. etc is your own fault.
 
 import minescript as ms
+import heapq
+import json
+import math
+import os
 import time
+import queue
 import random
 import sys
+from collections import deque
+from contextlib import contextmanager
 
 # ===== CONFIGURATION =====
 CONFIG = {
@@ -22,32 +29,585 @@ CONFIG = {
     "pause_during_movement": (0.05, 0.15),  # Small pauses while moving
     "movement_duration_variance": 0.1,  # Variance in movement timing (0.0-0.3)
     
-    # Detection settings
-    "check_interval": 0.1,  # How often to check position (seconds)
-    "stuck_threshold": 0.05,  # Movement less than this is considered "stuck"
-    "stuck_checks": 3,  # Number of checks before considering stuck
+    # Detection settings (positions are sampled on client ticks, 20 per second)
+    "sample_ticks": 2,  # Ticks between position samples while moving
+    "max_sample_ticks": 8,  # Longest gap between samples while the learned row end is still far away
+    "stop_speed": 1.0,  # Moving slower than this (blocks per second) counts as stopped
+    "start_ticks": 4,  # Ticks to get up to speed before standing still counts as stopped
+    "velocity_window": 8,  # Position samples kept in the ring buffer
+    "predict_row_end": True,  # Learn where rows end and stop there instead of waiting to get stuck
+    
+    # Crop prescan
+    "prescan_crops": False,  # Read crop ages first and only walk rows (and parts of rows) with mature crops
+    "farm_bounds": None,  # Corners ((x1, z1), (x2, z2)) of the crop area: stop after its last row, needed for prescan_crops
+    
+    # Plots (several farms, or layers of a stacked farm, harvested whenever they have grown back)
+    "plots_file": None,  # JSON file with the plots and the transitions between them (see load_plots), None = one farm
+    "regrow_seconds": 1200,  # Default time for a harvested plot to grow back
+    "walk_speed": 4.3,  # Blocks per second walking, for estimating travel times between plots
+    "climb_speed": 2.35,  # Blocks per second up ladders
+    
+    # Checkpoint
+    "checkpoint_file": "farm_checkpoint.json",  # Progress saved after every row for --resume (None = off)
+    "resume": False,  # Continue at the row saved in checkpoint_file instead of starting over
+    "checkpoint_row_times": 100,  # How many of the latest row timings the checkpoint keeps
     
     # Safety
     "max_iterations": 1000,  # Maximum number of rows before auto-stop
     "enable_sprint": True,  # Whether to enable sprinting
+    
+    # Metrics
+    "metrics_file": None,  # File for timing/call summaries (JSON lines)
+    "metrics_interval": 60.0,  # Seconds between summaries written to metrics_file
+    
+    # Logging
+    "log_level": "info",  # Chat messages below this level are only counted in summaries ("debug" shows every row)
+    "log_summary_interval": 60.0,  # Seconds between chat summaries of hidden messages
+    "log_max_per_second": 5,  # Chat messages per second before the rest are held back
+    "log_file": None,  # File every message is appended to, whatever its level
+}
+
+# Instrumentation and ChatLog are cut-down copies of the classes of the same
+# name in SmoothLookAutoMining.py (each script is used on its own, so they
+# are mirrored on purpose). Keep behaviour changes in step with that file.
+
+class _CountedModule:
+    """Forwards to a module and counts calls to its functions by name."""
+        
+    def __init__(self, module, counts):
+        self._module = module
+        self._counts = counts
+        
+    def __getattr__(self, name):
+        attr = getattr(self._module, name)
+        if callable(attr) and not isinstance(attr, type):
+            function, counts = attr, self._counts
+            
+            def counted(*args, **kwargs):
+                counts[name] = counts.get(name, 0) + 1
+                return function(*args, **kwargs)
+            
+            attr = counted
+        setattr(self, name, attr)  # Later lookups skip __getattr__
+        return attr
+
+class Instrumentation:
+    """
+    Per-phase timers (exclusive: nested phases don't count for the outer
+    one), minescript call counters and free-form counters. Totals since start
+    are appended to a file as JSON lines every interval seconds.
+    """
+        
+    def __init__(self):
+        self.path = None
+        self.interval = 60.0
+        self.phase_seconds = {}
+        self.phase_counts = {}
+        self.call_counts = {}
+        self.counters = {}
+        self._stack = []  # [name, start] of the active phases
+        self.started = self.last_flush = time.perf_counter()
+        
+    def configure(self, path, interval):
+        """Set where and how often summaries are written (path None = never)."""
+        self.path = path
+        self.interval = interval
+        
+    @contextmanager
+    def phase(self, name):
+        """Use as `with self.metrics.phase("row"):` to time a block of code."""
+        now = time.perf_counter()
+        if self._stack:
+            self._charge(self._stack[-1], now)
+        self._stack.append([name, now])
+        self.phase_counts[name] = self.phase_counts.get(name, 0) + 1
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            self._charge(self._stack.pop(), now)
+            if self._stack:
+                self._stack[-1][1] = now
+        
+    def _charge(self, frame, now):
+        self.phase_seconds[frame[0]] = self.phase_seconds.get(frame[0], 0.0) + now - frame[1]
+        frame[1] = now
+        
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+        
+    def count_calls(self, module):
+        """Wrap a module so every function call on it is counted."""
+        return _CountedModule(module, self.call_counts)
+        
+    def maybe_flush(self):
+        """Write a summary if the interval has passed."""
+        if self.path and time.perf_counter() - self.last_flush >= self.interval:
+            self.flush()
+        
+    def flush(self):
+        """Append a summary to the metrics file."""
+        self.last_flush = time.perf_counter()
+        if not self.path:
+            return
+        summary = {
+            "time": time.time(),
+            "elapsed": time.perf_counter() - self.started,
+            "phases": {name: {"seconds": round(seconds, 4), "count": self.phase_counts.get(name, 0)}
+                       for name, seconds in self.phase_seconds.items()},
+            "calls": dict(self.call_counts),
+            "counters": dict(self.counters),
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(summary) + "\n")
+
+class ChatLog:
+    """
+    Leveled chat logging. Messages at the chat level or above are echoed (at
+    most max_per_second, errors always); the others are counted by key and
+    summarized every summary_interval seconds. The last messages are kept
+    for echo_recent, and every message goes to the log file if one is set.
+    """
+        
+    LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+        
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self.configure()
+        
+    def configure(self, level="info", path=None, summary_interval=60.0, max_per_second=5):
+        self.level = self.LEVELS[level]
+        self.path = path
+        self.summary_interval = summary_interval
+        self.max_per_second = max_per_second
+        self.recent = deque(maxlen=200)  # (level, message) of the latest messages
+        self.hidden = {}  # Key -> messages not echoed since the last summary
+        self.held_back = 0  # Messages over the chat rate since the last summary
+        self.pending = []  # Lines not written to the file yet
+        self.window_start = 0.0
+        self.window_count = 0
+        self.last_summary = time.perf_counter()
+        
+    def log(self, level, message, key=None):
+        """Log a message; key groups it in summaries (defaults to the level)."""
+        now = time.perf_counter()
+        self.recent.append((level, message))
+        if self.path:
+            self.pending.append(f"{time.strftime('%H:%M:%S')} {level.upper():<7} {message}\n")
+        
+        if self.LEVELS[level] < self.level:
+            key = key or level
+            self.hidden[key] = self.hidden.get(key, 0) + 1
+        else:
+            # Chat rate limit, errors always get through
+            if now - self.window_start >= 1.0:
+                self.window_start = now
+                self.window_count = 0
+            if self.window_count < self.max_per_second or level == "error":
+                self.window_count += 1
+                ms.echo(self.prefix + message)
+            else:
+                self.held_back += 1
+        
+        if self.summary_interval and now - self.last_summary >= self.summary_interval:
+            self.summarize()
+        
+    def echo_recent(self, level="warning", count=5):
+        """Echo the latest messages at level or above again, e.g. the warnings of a run at its end."""
+        lines = [message for line_level, message in self.recent
+                 if self.LEVELS[line_level] >= self.LEVELS[level]][-count:]
+        if lines:
+            ms.echo(f"{self.prefix}Last {len(lines)} messages at {level} or above:")
+            for message in lines:
+                ms.echo(self.prefix + "  " + message.strip())
+        
+    def summarize(self):
+        """Echo counts of the messages that weren't shown and write pending file lines."""
+        elapsed = time.perf_counter() - self.last_summary
+        self.last_summary = time.perf_counter()
+        parts = [f"{count} {key}" for key, count in sorted(self.hidden.items(), key=lambda item: -item[1])]
+        if self.held_back:
+            parts.append(f"{self.held_back} held back")
+        if parts:
+            ms.echo(f"{self.prefix}[last {elapsed:.0f}s] " + ", ".join(parts))
+        self.hidden.clear()
+        self.held_back = 0
+        
+        if self.pending:
+            with open(self.path, "a") as f:
+                f.writelines(self.pending)
+            self.pending = []
+
+class MovementSampler:
+    """
+    Samples the player's position on client ticks (one player_position call
+    per sample) into a ring buffer and estimates the speed along one movement
+    axis, so a stop shows up in the first sample after it. Use as a context
+    manager, it listens for tick events while open (or counts ticks on the
+    clock with Minescript versions that have no tick events).
+    """
+        
+    TICK_SECONDS = 0.05
+        
+    def __init__(self, axis, window):
+        self.axis = axis  # Unit (x, z) movement direction
+        self.samples = deque(maxlen=window)  # (tick, position, distance along the axis)
+        self.tick = 0  # Ticks seen since the sampler was opened
+        self.last_moving_tick = 0  # Tick of the last sample that still showed movement
+        self.events = None  # None when ticks are counted on the clock
+        self.started = None
+        
+    def __enter__(self):
+        self.started = time.perf_counter()
+        if hasattr(ms.EventQueue, "register_tick_listener"):
+            self.events = ms.EventQueue()
+            self.events.register_tick_listener()
+        return self
+        
+    def __exit__(self, *exc_info):
+        if self.events is not None:
+            self.events.unregister_all()
+        return False
+        
+    def wait_ticks(self, ticks):
+        """Wait until ticks more client ticks have passed"""
+        target = self.tick + ticks
+        if self.events is None:
+            time.sleep(max(0.0, self.started + target * self.TICK_SECONDS - time.perf_counter()))
+            self.tick = target
+            return
+        while self.tick < target:
+            self.events.get()
+            self.tick += 1
+        
+    def catch_up(self):
+        """Count ticks that already passed (e.g. during a pause) so they match the position"""
+        if self.events is None:
+            elapsed = time.perf_counter() - self.started
+            self.tick = max(self.tick, int(elapsed / self.TICK_SECONDS + 1e-6))
+            return
+        while True:
+            try:
+                self.events.get(block=False)
+            except queue.Empty:
+                break
+            self.tick += 1
+        
+    def sample(self):
+        """Record the current position; returns (position, distance along the axis)"""
+        position = ms.player_position()
+        self.catch_up()
+        along = position[0] * self.axis[0] + position[2] * self.axis[1]
+        self.samples.append((self.tick, position, along))
+        speed = self.speed()
+        if speed is not None and speed >= CONFIG["stop_speed"]:
+            self.last_moving_tick = self.tick
+        return position, along
+        
+    def speed(self):
+        """Speed along the axis in blocks per second between the last two samples (None before that)"""
+        if len(self.samples) < 2:
+            return None
+        (tick0, _, along0), (tick1, _, along1) = self.samples[-2], self.samples[-1]
+        return (along1 - along0) / (max(tick1 - tick0, 1) * self.TICK_SECONDS)
+        
+    def stopped(self):
+        """Check if the player stopped moving along the axis (once it had time to get up to speed)"""
+        speed = self.speed()
+        return speed is not None and speed < CONFIG["stop_speed"] and self.tick >= CONFIG["start_ticks"]
+        
+    def ticks_until(self, distance):
+        """Ticks until distance (along the axis) is reached at the current speed, None if not moving"""
+        speed = self.speed()
+        if speed is None or speed < CONFIG["stop_speed"]:
+            return None
+        return (distance - self.samples[-1][2]) / (speed * self.TICK_SECONDS)
+
+# Blocks the player walks through at feet level inside a row (crops are recognized by their age)
+WALK_THROUGH_BLOCKS = {"minecraft:air", "minecraft:cave_air", "minecraft:short_grass", "minecraft:grass"}
+
+# Age of fully grown crops (block state age=N)
+CROP_MAX_AGE = {
+    "minecraft:wheat": 7,
+    "minecraft:carrots": 7,
+    "minecraft:potatoes": 7,
+    "minecraft:beetroots": 3,
+    "minecraft:nether_wart": 3,
 }
 
+def is_mature_crop(block):
+    """Check if a block (with block states) is a fully grown crop"""
+    if not block:
+        return False
+    name, _, states = block.partition("[")
+    max_age = CROP_MAX_AGE.get(name)
+    if max_age is None:
+        return False
+    for state in states.rstrip("]").split(","):
+        key, _, value = state.partition("=")
+        if key == "age":
+            return int(value) >= max_age
+    return False
+
+class Plot:
+    """One layer of a farm: where its serpentine starts and when it has grown back."""
+        
+    def __init__(self, name, start, yaw, bounds, forward_blocks, direction, regrow_seconds):
+        self.name = name
+        self.start = start  # Block the serpentine starts in (row 0)
+        self.yaw = yaw  # Facing at the start, rows run to its right and left
+        self.bounds = bounds  # Corners ((x1, z1), (x2, z2)) of the crop area
+        self.forward_blocks = forward_blocks
+        self.direction = direction  # Direction of the first row
+        self.regrow_seconds = regrow_seconds
+        self.ready_at = 0.0  # Time the crops are expected to be grown back
+        self.row_ends = {}  # Learned row ends, kept between visits
+        
+    def entrance(self):
+        """Center of the start block at feet level"""
+        return (self.start[0] + 0.5, self.start[1], self.start[2] + 0.5)
+        
+    def contains(self, position):
+        """Check if a position is on this layer, inside its bounds (walls included)"""
+        (x1, z1), (x2, z2) = self.bounds
+        return (math.floor(position[1] + 0.5) == self.start[1]
+                and min(x1, x2) - 1 <= math.floor(position[0]) <= max(x1, x2) + 1
+                and min(z1, z2) - 1 <= math.floor(position[2]) <= max(z1, z2) + 1)
+
+def load_plots(path):
+    """
+    Read the plots and the transitions between them from a JSON file:
+    
+    {"plots": [{"name": "wheat", "start": [0, 64, 0], "yaw": 0, "bounds": [[-15, 0], [0, 31]],
+                "layers": [64, 70], "forward_blocks": 4, "initial_direction": "right",
+                "regrow_seconds": 1200}],
+     "transitions": [{"from": "wheat@64", "to": "wheat@70",
+                      "path": [[2.5, 64, 0.5], [3.5, 70, 0.5], [2.5, 70, 0.5]]}]}
+    
+    Every layer (start y, default just the start's) becomes a plot named name@y.
+    Transitions are waypoints walked in order: higher ones are climbed (ladders),
+    lower ones dropped down to (holes, water drops). Plots at the same height are
+    reached by walking straight to their start. Only name, start and bounds are required.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    
+    plots = []
+    for entry in data["plots"]:
+        x, y, z = entry["start"]
+        (x1, z1), (x2, z2) = entry["bounds"]
+        for layer in entry.get("layers", [y]):
+            plots.append(Plot(f"{entry['name']}@{layer}", (x, layer, z), entry.get("yaw", 0.0),
+                              ((x1, z1), (x2, z2)), entry.get("forward_blocks", CONFIG["forward_blocks"]),
+                              entry.get("initial_direction", CONFIG["initial_direction"]),
+                              entry.get("regrow_seconds", CONFIG["regrow_seconds"])))
+    
+    names = {plot.name: plot for plot in plots}
+    transitions = []
+    for entry in data.get("transitions", []):
+        for key in ("from", "to"):
+            if entry[key] not in names:
+                raise ValueError(f"Transition {key} unknown plot {entry[key]}")
+        if not entry["path"]:
+            raise ValueError(f"Transition from {entry['from']} to {entry['to']} has no path")
+        transitions.append((names[entry["from"]], names[entry["to"]], [tuple(point) for point in entry["path"]]))
+    return plots, transitions
+
 class FarmAutomation:
     def __init__(self):
         self.running = False
         self.current_direction = CONFIG["initial_direction"]
         self.iterations = 0
-        self.last_positions = []
+        self.metrics = Instrumentation()
+        self.chat = ChatLog("[AutoFarm] ")
+        self.yaw = 0.0  # Facing direction at the start, defines the movement axes
+        self.row_ends = {}  # Direction -> learned end of the rows, as a distance along its axis
+        self.origin = None  # Block the player stood in at the start (row 0)
+        self.row = 0  # Current row, counted in forward_blocks steps from the start
+        self.maturity = None  # Row -> sorted offsets (to the right of the start) of its mature crops
+        self.row_times = deque(maxlen=CONFIG["checkpoint_row_times"])  # Seconds per finished row
+        self.forward_blocks = CONFIG["forward_blocks"]  # Row spacing of the current farm
+        self.bounds = CONFIG["farm_bounds"]  # Crop area of the current farm (None = unknown)
+        self.plots = None  # Plots from plots_file, None = one farm starting where the player stands
+        self.transitions = []  # (from plot, to plot, waypoints)
+        self.current_plot = None  # Plot the player is on
         
-    def log(self, message):
-        """Log message to chat"""
-        ms.echo(f"[AutoFarm] {message}")
+    def log(self, message, level="info", key=None):
+        """Log message (to chat if its level is shown, see ChatLog)"""
+        self.chat.log(level, message, key)
         
     def get_position(self):
         """Get current player position"""
         player = ms.player()
         return player.position
         
+    def movement_axis(self, direction):
+        """Unit (x, z) vector the player moves along when pressing a direction key"""
+        yaw = math.radians(self.yaw)
+        forward = (-math.sin(yaw), math.cos(yaw))
+        right = (-math.cos(yaw), -math.sin(yaw))
+        return {"forward": forward, "backward": (-forward[0], -forward[1]),
+                "right": right, "left": (-right[0], -right[1])}[direction]
+        
+    def row_continues(self, position, axis):
+        """Check whether the block just past position along axis can be walked into (row not over)"""
+        x = position[0] + axis[0] * 0.8
+        z = position[2] + axis[1] * 0.8
+        block = ms.getblock(math.floor(x), math.floor(position[1] + 0.5), math.floor(z))
+        return block.partition("[")[0] in WALK_THROUGH_BLOCKS or "age=" in block
+        
+    def grid_axis(self, direction):
+        """Block grid step (dx, dz) closest to a movement direction"""
+        return tuple(round(component) for component in self.movement_axis(direction))
+        
+    def grid_offset(self, position):
+        """Offset (right, forward) of a position from the center of the start block, in blocks"""
+        dx = position[0] - (self.origin[0] + 0.5)
+        dz = position[2] - (self.origin[2] + 0.5)
+        (rx, rz), (fx, fz) = self.grid_axis("right"), self.grid_axis("forward")
+        return dx * rx + dz * rz, dx * fx + dz * fz
+        
+    def row_along(self, direction, offset):
+        """Distance along the axis of direction ("right" or "left") of the block offset blocks right of the start"""
+        rx, rz = self.grid_axis("right")
+        along = offset + (self.origin[0] + 0.5) * rx + (self.origin[2] + 0.5) * rz
+        return along if direction == "right" else -along
+        
+    def bounds_grid(self):
+        """Rows and offsets (to the right of the start) inside the farm bounds"""
+        (x1, z1), (x2, z2) = self.bounds
+        ox, _, oz = self.origin
+        (rx, rz), (fx, fz) = self.grid_axis("right"), self.grid_axis("forward")
+        spacing = self.forward_blocks
+        
+        # Rows behind the start are never reached
+        corners = [(x - ox, z - oz) for x in (x1, x2) for z in (z1, z2)]
+        rights = [dx * rx + dz * rz for dx, dz in corners]
+        forwards = [dx * fx + dz * fz for dx, dz in corners]
+        offsets = range(min(rights), max(rights) + 1)
+        rows = range(max(0, -(-min(forwards) // spacing)), max(forwards) // spacing + 1)
+        return rows, offsets
+        
+    def scan_crops(self):
+        """Read the crop ages in the farm bounds with one getblocklist call and map the mature crops per row"""
+        ox, oy, oz = self.origin
+        (rx, rz), (fx, fz) = self.grid_axis("right"), self.grid_axis("forward")
+        spacing = self.forward_blocks
+        rows, offsets = self.bounds_grid()
+        
+        cells = [(row, offset) for row in rows for offset in offsets]
+        positions = [[ox + offset * rx + row * spacing * fx, oy, oz + offset * rz + row * spacing * fz]
+                     for row, offset in cells]
+        with self.metrics.phase("prescan"):
+            blocks = ms.getblocklist(positions) if positions else []
+        
+        self.maturity = {}
+        for (row, offset), block in zip(cells, blocks):
+            if is_mature_crop(block):
+                self.maturity.setdefault(row, []).append(offset)
+        
+        mature = sum(len(row_offsets) for row_offsets in self.maturity.values())
+        self.log(f"Prescan: {mature} mature crops in {len(self.maturity)} of {len(rows)} rows")
+        
+    def next_mature_row(self, first):
+        """First row from first on that has mature crops, None if there is none"""
+        rows = [row for row in self.maturity if row >= first]
+        return min(rows) if rows else None
+        
+    def move_to_row(self, row):
+        """Move forward (or back) to a row, rows are forward_blocks apart starting at the start block"""
+        _, forward = self.grid_offset(ms.player_position())
+        distance = row * self.forward_blocks - forward
+        if distance >= 0.5:
+            self.move_forward_blocks(distance)
+        elif distance <= -0.5:
+            self.move_forward_blocks(-distance, "backward")
+        self.metrics.count("rows_skipped", max(0, row - self.row - 1))
+        self.row = row
+        
+    def save_checkpoint(self, finished=False):
+        """Write the progress (next row, its direction, the farm origin and row timings) to checkpoint_file"""
+        path = CONFIG["checkpoint_file"]
+        if path is None or self.plots is not None:
+            return  # Plot runs start over, the scheduler knows nothing is grown back yet
+        checkpoint = {
+            "row": self.row,
+            "iterations": self.iterations,
+            "direction": self.current_direction,
+            "origin": list(self.origin),
+            "yaw": self.yaw,
+            "forward_blocks": CONFIG["forward_blocks"],
+            "row_ends": self.row_ends,
+            "row_times": [round(seconds, 3) for seconds in self.row_times],
+            "finished": finished,
+            "saved_at": time.time(),
+        }
+        try:
+            # Write to a temporary file first so a crash never leaves half a file
+            temp_path = path + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump(checkpoint, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            self.log(f"Could not save checkpoint: {e}", "warning", "checkpoint")
+            
+    def load_checkpoint(self):
+        """Restore the progress saved in checkpoint_file, returns False if there is nothing to resume"""
+        path = CONFIG["checkpoint_file"]
+        if path is None or not os.path.exists(path):
+            self.log("No checkpoint to resume from, starting at row 1", "warning")
+            return False
+        try:
+            with open(path) as f:
+                checkpoint = json.load(f)
+            if checkpoint["finished"]:
+                self.log("Last run finished, starting at row 1")
+                return False
+            if checkpoint["forward_blocks"] != CONFIG["forward_blocks"]:
+                self.log("Checkpoint was saved with different forward blocks, starting at row 1", "warning")
+                return False
+            self.row = checkpoint["row"]
+            self.iterations = checkpoint["iterations"]
+            self.current_direction = checkpoint["direction"]
+            self.origin = tuple(checkpoint["origin"])
+            self.yaw = checkpoint["yaw"]
+            self.row_ends = checkpoint["row_ends"]
+            self.row_times.extend(checkpoint["row_times"])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.log(f"Unreadable checkpoint ({e}), starting at row 1", "warning")
+            return False
+        return True
+        
+    def harvest_row(self):
+        """Walk only the part of the current row that has mature crops, holding attack only for those"""
+        mature = self.maturity.get(self.row, [])
+        offset, _ = self.grid_offset(ms.player_position())
+        current = round(offset)
+        right = [cell for cell in mature if cell > current]
+        left = [cell for cell in mature if cell < current]
+        
+        # Reach the nearer end first if there are mature crops on both sides
+        targets = []
+        if right:
+            targets.append(("right", right[-1]))
+        if left:
+            targets.append(("left", left[0]))
+        targets.sort(key=lambda target: abs(target[1] - offset))
+        
+        mature_cells = set(mature)
+        for direction, cell in targets:
+            sign = 1 if direction == "right" else -1
+            start = self.row_along("right", 0)
+            
+            def next_is_mature(along, sign=sign, start=start):
+                # The block entered next when walking on from along
+                return round(sign * along - start) + sign in mature_cells
+            
+            self.current_direction = direction
+            self.move_direction(direction, self.row_along(direction, cell), next_is_mature)
+            if not self.running:
+                break
+        
     def add_human_variance(self, base_value):
         """Add random variance to make movement more human-like"""
         variance = random.uniform(-CONFIG["position_variance"], CONFIG["position_variance"])
@@ -61,28 +621,199 @@ class FarmAutomation:
             min_pause, max_pause = CONFIG["pause_during_movement"]
         
         pause_duration = random.uniform(min_pause, max_pause)
-        time.sleep(pause_duration)
+        with self.metrics.phase("humanization"):
+            time.sleep(pause_duration)
         
-    def is_stuck(self):
-        """Check if player is stuck (not moving)"""
-        if len(self.last_positions) < CONFIG["stuck_checks"]:
-            return False
+    def travel_seconds(self, start, end):
+        """Estimated time to walk (or climb, or drop) from start to end"""
+        seconds = math.hypot(end[0] - start[0], end[2] - start[2]) / CONFIG["walk_speed"]
+        return seconds + max(0.0, end[1] - start[1]) / CONFIG["climb_speed"]
+        
+    def plan_route(self, position, target):
+        """
+        Fastest way from position to the start of target, following the transitions
+        between heights. Returns (estimated seconds, waypoints) or None if there is none.
+        """
+        entrance = target.entrance()
+        # (seconds, tie breaker, plot the player is on, position, waypoints)
+        routes = [(0.0, 0, self.current_plot, tuple(position), [])]
+        used = set()  # Transitions already taken by a faster route
+        counter = 1
+        while routes:
+            seconds, _, plot, at, waypoints = heapq.heappop(routes)
+            if plot is target and at == entrance:
+                return seconds, waypoints
             
-        # Check if all recent positions are very close together
-        recent_positions = self.last_positions[-CONFIG["stuck_checks"]:]
-        for i in range(1, len(recent_positions)):
-            x_diff = abs(recent_positions[i][0] - recent_positions[i-1][0])
-            z_diff = abs(recent_positions[i][2] - recent_positions[i-1][2])
+            # Same height: walk straight to the start
+            if math.floor(at[1] + 0.5) == target.start[1]:
+                heapq.heappush(routes, (seconds + self.travel_seconds(at, entrance), counter, target, entrance,
+                                        waypoints + [entrance]))
+                counter += 1
             
-            # If any position shows significant movement, not stuck
-            if x_diff > CONFIG["stuck_threshold"] or z_diff > CONFIG["stuck_threshold"]:
+            for index, (source, destination, path) in enumerate(self.transitions):
+                on_source = source is plot or (plot is None and math.floor(at[1] + 0.5) == source.start[1])
+                if index in used or not on_source:
+                    continue
+                used.add(index)
+                cost = self.travel_seconds(at, path[0])
+                cost += sum(self.travel_seconds(a, b) for a, b in zip(path, path[1:]))
+                heapq.heappush(routes, (seconds + cost, counter, destination, path[-1], waypoints + path))
+                counter += 1
+        return None
+        
+    def next_plot(self):
+        """
+        Pick the plot that can be started first (ready and closest), returns
+        (plot, estimated travel seconds, waypoints) or (None, 0, []) if none can be reached.
+        """
+        position = ms.player_position()
+        if self.current_plot is None:
+            self.current_plot = next((plot for plot in self.plots if plot.contains(position)), None)
+        
+        now = time.time()
+        best, best_key = (None, 0.0, []), None
+        for plot in self.plots:
+            route = self.plan_route(position, plot)
+            if route is None:
+                continue
+            seconds, waypoints = route
+            key = (max(now + seconds, plot.ready_at), seconds)  # Start time, then travel time
+            if best_key is None or key < best_key:
+                best, best_key = (plot, seconds, waypoints), key
+        return best
+        
+    def walk_to(self, target):
+        """
+        Walk to a waypoint, facing it. Ladders on the way are climbed and holes dropped
+        down (movement keys only). Returns False if the player got stuck.
+        """
+        forward = False
+        pitch = ms.player_orientation()[1]
+        
+        try:
+            with MovementSampler(self.movement_axis("forward"), CONFIG["velocity_window"]) as sampler:
+                position, _ = sampler.sample()
+                remaining = None
+                while self.running:
+                    dx, dz = target[0] - position[0], target[2] - position[2]
+                    horizontal = math.hypot(dx, dz)
+                    rise = target[1] - position[1]
+                    
+                    # Arrived, or over the waypoint and done falling
+                    if horizontal < 0.3 and abs(rise) < 0.1:
+                        return True
+                    
+                    # Turn towards the waypoint when off by more than a few degrees
+                    if horizontal >= 0.3:
+                        yaw = math.degrees(math.atan2(-dx, dz))
+                        if abs((yaw - self.yaw + 180) % 360 - 180) > 10:
+                            ms.player_set_orientation(yaw, pitch)
+                            self.yaw = yaw
+                            sampler.axis = self.movement_axis("forward")
+                            sampler.samples.clear()
+                    
+                    # Keep walking (into a ladder to climb it) until over the waypoint
+                    walk = horizontal >= 0.3 or rise >= 0.1
+                    if walk != forward:
+                        forward = walk
+                        ms.player_press_forward(forward)
+                        if CONFIG["enable_sprint"]:
+                            ms.player_press_sprint(forward and rise < 0.5)
+                    
+                    sampler.wait_ticks(CONFIG["sample_ticks"])
+                    position, _ = sampler.sample()
+                    
+                    # Stop right over the waypoint if it is passed before the next sample
+                    ticks_left = sampler.ticks_until(target[0] * sampler.axis[0] + target[2] * sampler.axis[1])
+                    if ticks_left is not None and ticks_left <= CONFIG["sample_ticks"] and rise < 0.1:
+                        time.sleep(max(0.0, ticks_left * MovementSampler.TICK_SECONDS))
+                        ms.player_press_forward(False)
+                        forward = False
+                        position = ms.player_position()
+                    
+                    # Stuck if getting no closer (walking, climbing or falling)
+                    previous, remaining = remaining, math.hypot(target[0] - position[0], target[1] - position[1],
+                                                                target[2] - position[2])
+                    progress = CONFIG["stop_speed"] * CONFIG["sample_ticks"] * MovementSampler.TICK_SECONDS
+                    if previous is not None and sampler.tick >= CONFIG["start_ticks"] and previous - remaining < progress:
+                        return horizontal < 0.3 and abs(target[1] - position[1]) < 0.1
+        finally:
+            ms.player_press_forward(False)
+            if CONFIG["enable_sprint"]:
+                ms.player_press_sprint(False)
+        return False
+        
+    def travel(self, waypoints):
+        """Walk through waypoints in order, returns False if one could not be reached"""
+        for waypoint in waypoints:
+            if not self.walk_to(waypoint):
+                self.log(f"Stuck on the way to ({waypoint[0]:.1f}, {waypoint[1]:.1f}, {waypoint[2]:.1f})", "warning")
                 return False
-                
         return True
         
-    def move_direction(self, direction):
-        """Move in specified direction until stuck"""
-        self.log(f"Moving {direction}...")
+    def enter_plot(self, plot):
+        """Make plot the current farm (the player stands at its start)"""
+        self.current_plot = plot
+        self.origin = plot.start
+        self.yaw = plot.yaw
+        ms.player_set_orientation(plot.yaw, ms.player_orientation()[1])
+        self.bounds = plot.bounds
+        self.forward_blocks = plot.forward_blocks
+        self.current_direction = plot.direction
+        self.row_ends = plot.row_ends
+        self.row = 0
+        self.maturity = None
+        
+    def wait(self, seconds):
+        """Sleep for a while (in short steps, so stopping is not delayed)"""
+        end = time.time() + seconds
+        while self.running and time.time() < end:
+            time.sleep(min(1.0, end - time.time()))
+            
+    def run_plots(self):
+        """Harvest the plots in plots_file over and over, each one once it has grown back"""
+        self.plots, self.transitions = load_plots(CONFIG["plots_file"])
+        self.log(f"Loaded {len(self.plots)} plots and {len(self.transitions)} transitions")
+        
+        while self.running and self.iterations < CONFIG["max_iterations"]:
+            plot, seconds, waypoints = self.next_plot()
+            if plot is None:
+                self.log("No plot can be reached from here.", "error")
+                return
+            
+            # Nothing grown back by the time the player gets there: wait here
+            wait = plot.ready_at - time.time() - seconds
+            if wait > 0:
+                self.log(f"Waiting {wait:.0f}s for {plot.name} to grow back", "info" if wait >= 1 else "debug", "wait")
+                with self.metrics.phase("waiting"):
+                    self.wait(wait)
+                if not self.running:
+                    return
+            
+            self.log(f"Going to {plot.name} (about {seconds:.0f}s)", "debug", "plot")
+            with self.metrics.phase("travel"):
+                arrived = self.travel(waypoints)
+            if not arrived:
+                self.current_plot = None  # Somewhere on the way
+                plot.ready_at = time.time() + plot.regrow_seconds  # Try the others first
+                continue
+            
+            self.enter_plot(plot)
+            self.log(f"Harvesting {plot.name}")
+            self.farm_rows()
+            plot.ready_at = time.time() + plot.regrow_seconds
+            self.metrics.count("plots")
+            
+        if self.iterations >= CONFIG["max_iterations"]:
+            self.log(f"Reached maximum iterations ({CONFIG['max_iterations']}). Stopping.")
+        
+    def move_direction(self, direction, end=None, harvest=None):
+        """
+        Move in specified direction until the end of the row, or until end (a distance
+        along the movement axis). harvest(along) tells whether the crop walked into next
+        is mature, attack is then only held for those.
+        """
+        self.log(f"Moving {direction}...", "debug", "move")
         
         # Press the movement key
         if direction == "right":
@@ -99,32 +830,60 @@ class FarmAutomation:
             ms.player_press_sprint(True)
         
         # Enable auto-break if configured
-        if CONFIG["auto_break"]:
+        attacking = CONFIG["auto_break"] and harvest is None
+        if attacking:
             ms.player_press_attack(True)
             
-        # Track positions to detect when stuck
-        self.last_positions = []
+        # Where this row should end, learned from earlier rows
+        axis = self.movement_axis(direction)
+        predicted_end = end
+        if end is None and CONFIG["predict_row_end"]:
+            predicted_end = self.row_ends.get(direction)
+        gap = CONFIG["sample_ticks"]  # Ticks until the next position sample
         
         try:
-            while self.running:
-                time.sleep(CONFIG["check_interval"])
-                
-                # Add occasional micro-pauses to simulate human movement
-                if random.random() < 0.1:  # 10% chance
-                    self.random_pause("during_movement")
-                
-                # Record position
-                current_pos = self.get_position()
-                self.last_positions.append(current_pos)
-                
-                # Keep only recent positions
-                if len(self.last_positions) > CONFIG["stuck_checks"]:
-                    self.last_positions.pop(0)
-                
-                # Check if stuck - need enough position samples first
-                if len(self.last_positions) >= CONFIG["stuck_checks"]:
-                    if self.is_stuck():
-                        self.log(f"Reached end (stuck detected)")
+            with MovementSampler(axis, CONFIG["velocity_window"]) as sampler:
+                if harvest is not None:
+                    _, along = sampler.sample()
+                while self.running:
+                    # Hold attack only while the next crop is mature
+                    if harvest is not None and CONFIG["auto_break"] and harvest(along) != attacking:
+                        attacking = not attacking
+                        ms.player_press_attack(attacking)
+                    
+                    sampler.wait_ticks(gap)
+                    
+                    # Add occasional micro-pauses to simulate human movement (about one per second)
+                    if random.random() < 0.05 * gap:
+                        self.random_pause("during_movement")
+                    
+                    current_pos, along = sampler.sample()
+                    gap = CONFIG["sample_ticks"]
+                    
+                    # Stop right at the learned end of the row if it is reached before the next
+                    # sample, sample less often while it is still far away
+                    ticks_left = sampler.ticks_until(predicted_end) if predicted_end is not None else None
+                    if ticks_left is not None:
+                        if ticks_left <= gap:
+                            if end is None and self.row_continues(current_pos, axis):
+                                predicted_end = None  # Longer row than learned, wait until stopped
+                            else:
+                                time.sleep(max(0.0, ticks_left * MovementSampler.TICK_SECONDS))
+                                if end is None:
+                                    self.metrics.count("row_ends_predicted")
+                                self.log("Reached end (predicted)" if end is None else "Reached last mature crop",
+                                         "debug", "move")
+                                break
+                        elif harvest is None:
+                            gap = int(min(CONFIG["max_sample_ticks"], max(gap, ticks_left - gap)))
+                    
+                    # Stopped before or without a prediction - the row ends here
+                    if sampler.stopped():
+                        # Time spent pushing against the end before noticing
+                        self.metrics.count("stuck_detection_seconds",
+                                           (sampler.tick - sampler.last_moving_tick) * MovementSampler.TICK_SECONDS)
+                        self.row_ends[direction] = along  # Learn where rows end for the next ones
+                        self.log("Reached end (stopped)", "debug", "move")
                         break
                     
         finally:
@@ -144,17 +903,17 @@ class FarmAutomation:
             if CONFIG["auto_break"]:
                 ms.player_press_attack(False)
                 
-    def move_forward_blocks(self, blocks):
-        """Move forward a specific number of blocks"""
-        self.log(f"Moving forward {blocks} blocks...")
+    def move_forward_blocks(self, blocks, direction="forward"):
+        """Move forward (or backward) a specific number of blocks"""
+        self.log(f"Moving {direction} {blocks:.1f} blocks...", "debug", "forward")
         
-        start_pos = self.get_position()
         target_distance = blocks
         
         # Add human-like variance to target distance
         target_distance = self.add_human_variance(target_distance)
         
-        ms.player_press_forward(True)
+        press = ms.player_press_forward if direction == "forward" else ms.player_press_backward
+        press(True)
         if CONFIG["enable_sprint"]:
             ms.player_press_sprint(True)
         
@@ -162,39 +921,41 @@ class FarmAutomation:
         if CONFIG["auto_break"]:
             ms.player_press_attack(True)
         
-        # Track positions for stuck detection
-        self.last_positions = []
+        gap = CONFIG["sample_ticks"]
             
         try:
-            while self.running:
-                time.sleep(CONFIG["check_interval"])
-                
-                current_pos = self.get_position()
-                
-                # Record position for stuck detection
-                self.last_positions.append(current_pos)
-                if len(self.last_positions) > CONFIG["stuck_checks"]:
-                    self.last_positions.pop(0)
-                
-                # Check distance moved
-                distance_moved = abs(current_pos[2] - start_pos[2])
-                
-                # Check if stuck (can't move forward anymore)
-                if len(self.last_positions) >= CONFIG["stuck_checks"]:
-                    if self.is_stuck():
-                        self.log(f"Can't move forward further (moved {distance_moved:.1f} blocks)")
+            with MovementSampler(self.movement_axis(direction), CONFIG["velocity_window"]) as sampler:
+                _, start_along = sampler.sample()
+                target_along = start_along + target_distance
+                while self.running:
+                    sampler.wait_ticks(gap)
+                    _, along = sampler.sample()
+                    gap = CONFIG["sample_ticks"]
+                    
+                    # Check distance moved
+                    distance_moved = along - start_along
+                    if distance_moved >= target_distance:
                         break
-                
-                # Check if we've moved far enough
-                if distance_moved >= target_distance:
-                    break
                     
-                # Add occasional micro-pauses
-                if random.random() < 0.05:  # 5% chance
-                    self.random_pause("during_movement")
+                    # Stop exactly at the target if it is reached before the next sample
+                    ticks_left = sampler.ticks_until(target_along)
+                    if ticks_left is not None:
+                        if ticks_left <= gap:
+                            time.sleep(max(0.0, ticks_left * MovementSampler.TICK_SECONDS))
+                            break
+                        gap = int(min(CONFIG["max_sample_ticks"], max(gap, ticks_left - gap)))
+                    
+                    # Check if stopped (can't move forward anymore)
+                    if sampler.stopped():
+                        self.log(f"Can't move {direction} further (moved {distance_moved:.1f} blocks)")
+                        break
+                        
+                    # Add occasional micro-pauses
+                    if random.random() < 0.025 * gap:
+                        self.random_pause("during_movement")
                     
         finally:
-            ms.player_press_forward(False)
+            press(False)
             if CONFIG["enable_sprint"]:
                 ms.player_press_sprint(False)
             if CONFIG["auto_break"]:
@@ -210,47 +971,129 @@ class FarmAutomation:
         
     def run(self):
         """Main automation loop"""
+        global ms
+        
+        # Count every minescript call for the metrics summaries
+        if not isinstance(ms, _CountedModule):
+            ms = self.metrics.count_calls(ms)
+        self.metrics.configure(CONFIG["metrics_file"], CONFIG["metrics_interval"])
+        self.chat.configure(CONFIG["log_level"], CONFIG["log_file"], CONFIG["log_summary_interval"],
+                            CONFIG["log_max_per_second"])
+        
         self.running = True
         self.iterations = 0
         
-        start_pos = self.get_position()
+        player = ms.player()
+        start_pos = player.position
+        resumed = CONFIG["resume"] and CONFIG["plots_file"] is None and self.load_checkpoint()
+        if resumed:
+            # Face the way the farm was started in, the rows run along those axes
+            ms.player_set_orientation(self.yaw, ms.player_orientation()[1])
+            average = sum(self.row_times) / len(self.row_times) if self.row_times else 0.0
+            self.log(f"Resuming at row {self.iterations + 1} ({average:.1f}s per row so far)")
+        else:
+            self.yaw = player.yaw
+            self.origin = (math.floor(start_pos[0]), math.floor(start_pos[1] + 0.5), math.floor(start_pos[2]))
+            self.row = 0
         self.log(f"Starting automation from position: ({start_pos[0]:.1f}, {start_pos[1]:.1f}, {start_pos[2]:.1f})")
         self.log(f"Initial direction: {self.current_direction}")
         self.log(f"Forward blocks per row: {CONFIG['forward_blocks']}")
         self.log("Press ESC and run '\\jobs' then '\\kill <job_id>' to stop")
         
         try:
-            while self.running and self.iterations < CONFIG["max_iterations"]:
-                self.iterations += 1
-                self.log(f"Row {self.iterations} - Moving {self.current_direction}")
-                
-                # Move in current direction until end
-                self.move_direction(self.current_direction)
-                
-                # Add human-like pause before changing direction
-                self.random_pause("between_rows")
-                
-                # Move forward
-                self.move_forward_blocks(CONFIG["forward_blocks"])
-                
-                # Add another pause before next row
-                self.random_pause("between_rows")
-                
-                # Swap direction for next row
-                self.swap_direction()
-                
-            if self.iterations >= CONFIG["max_iterations"]:
-                self.log(f"Reached maximum iterations ({CONFIG['max_iterations']}). Stopping.")
+            if CONFIG["plots_file"] is not None:
+                self.run_plots()
             else:
-                self.log("Automation stopped.")
+                if CONFIG["prescan_crops"] and self.bounds is None:
+                    self.log("prescan_crops needs farm_bounds, walking every row", "warning")
+                self.farm_rows(resumed)
+                
+                if self.iterations >= CONFIG["max_iterations"]:
+                    self.save_checkpoint(finished=True)
+                    self.log(f"Reached maximum iterations ({CONFIG['max_iterations']}). Stopping.")
+                else:
+                    self.log("Automation stopped.")
                 
         except KeyboardInterrupt:
             self.log("Interrupted by user.")
         except Exception as e:
-            self.log(f"Error: {str(e)}")
+            self.log(f"Error: {str(e)}", "error")
         finally:
             self.cleanup()
             
+    def farm_rows(self, resumed=False):
+        """
+        Harvest the current farm row by row, from self.row to its last row (in the
+        bounds, or with mature crops if prescanned) or until max_iterations.
+        Returns True once the last row is done.
+        """
+        if CONFIG["prescan_crops"] and self.bounds is not None:
+            self.scan_crops()
+            
+            # Skip to the first row with mature crops
+            first_row = self.next_mature_row(self.row)
+            if first_row is None:
+                self.log("Nothing to harvest.")
+                return True
+            if first_row != self.row or resumed:
+                with self.metrics.phase("forward"):
+                    self.move_to_row(first_row)
+        elif resumed:
+            # Go back to the row the checkpoint was saved at
+            with self.metrics.phase("forward"):
+                self.move_to_row(self.row)
+        
+        last_row = self.bounds_grid()[0][-1] if self.bounds is not None else None
+        
+        while self.running and self.iterations < CONFIG["max_iterations"]:
+            self.iterations += 1
+            row_start = time.perf_counter()
+            self.log(f"Row {self.iterations} - Moving {self.current_direction}", "debug", "row")
+            
+            # Move in current direction until end (or only over the mature crops)
+            with self.metrics.phase("row"):
+                if self.maturity is not None:
+                    self.harvest_row()
+                else:
+                    self.move_direction(self.current_direction)
+            
+            # Add human-like pause before changing direction
+            self.random_pause("between_rows")
+            
+            # Next row (past rows without mature crops), done after the last one
+            if self.maturity is not None:
+                next_row = self.next_mature_row(self.row + 1)
+            else:
+                next_row = self.row + 1 if last_row is None or self.row < last_row else None
+            if next_row is None:
+                self.metrics.count("rows")
+                self.row_times.append(time.perf_counter() - row_start)
+                self.log("All mature crops harvested." if self.maturity is not None else "Reached the last row.")
+                self.save_checkpoint(finished=True)
+                return True
+            
+            # Move forward
+            with self.metrics.phase("forward"):
+                if self.maturity is not None:
+                    self.move_to_row(next_row)
+                else:
+                    self.move_forward_blocks(self.forward_blocks)
+                    self.row += 1
+            
+            # Add another pause before next row
+            self.random_pause("between_rows")
+            
+            # Swap direction for next row
+            self.swap_direction()
+            self.metrics.count("rows")
+            self.metrics.maybe_flush()
+            
+            # Save where to continue after an interruption
+            self.row_times.append(time.perf_counter() - row_start)
+            with self.metrics.phase("checkpoint"):
+                self.save_checkpoint()
+        return False
+        
     def cleanup(self):
         """Release all keys and clean up"""
         self.running = False
@@ -260,7 +1103,10 @@ class FarmAutomation:
         ms.player_press_backward(False)
         ms.player_press_sprint(False)
         ms.player_press_attack(False)
+        self.metrics.flush()
         self.log("Cleanup complete.")
+        self.chat.echo_recent()
+        self.chat.summarize()
 
 # ===== COMMAND LINE INTERFACE =====
 def print_help():
@@ -276,6 +1122,9 @@ Options:
   --no-sprint          : Disable sprinting
   --no-break           : Disable auto-breaking blocks
   --max-iter <n>       : Maximum iterations (default: 1000)
+  --prescan x1 z1 x2 z2 : Only walk rows with mature crops inside these corners
+  --resume             : Continue at the row saved by the last (interrupted) run
+  --plots <file>       : Harvest the plots (and layers) described in a JSON file
   --help               : Show this help message
 
 Examples:
@@ -283,6 +1132,7 @@ Examples:
   \\farm_auto_move --forward 3        - Move 3 blocks forward per row
   \\farm_auto_move --start-left       - Start by moving left
   \\farm_auto_move --forward 5 --no-sprint --no-break
+  \\farm_auto_move --resume           - Continue an interrupted run at its row
 """
     print(help_text)
 
@@ -314,6 +1164,18 @@ def main():
             if i + 1 < len(args):
                 CONFIG["max_iterations"] = int(args[i + 1])
                 i += 1
+        elif arg == "--resume":
+            CONFIG["resume"] = True
+        elif arg == "--plots":
+            if i + 1 < len(args):
+                CONFIG["plots_file"] = args[i + 1]
+                i += 1
+        elif arg == "--prescan":
+            if i + 4 < len(args):
+                x1, z1, x2, z2 = (int(value) for value in args[i + 1:i + 5])
+                CONFIG["farm_bounds"] = ((x1, z1), (x2, z2))
+                CONFIG["prescan_crops"] = True
+                i += 4
         
         i += 1
     
@@ -4,8 +4,24 @@
 # Getting banned, warned. etc is your own fault.
 
 import minescript
+import asyncio
+import json
 import math
+import os
+import queue
+import re
+import struct
+import sys
+import threading
 import time
+from array import array
+from collections import deque
+from types import SimpleNamespace
+
+try:
+    import numpy as np  # Optional, speeds up scans with a large search_distance
+except ImportError:
+    np = None
 
 # ============================================
 # CONFIGURATION OPTIONS
@@ -15,6 +31,11 @@ CONFIG = {
     # Examples: 'minecraft:iron_block', 'minecraft:diamond_ore', 
     #           'minecraft:gold_block', 'minecraft:stone', etc.
     # For crops, use base name like 'minecraft:wheat' (will match all ages)
+    # Several types can be mined at once, either as a list (earlier = visited first)
+    # or as a dict of priorities (higher = visited first), e.g.
+    #   ['minecraft:diamond_ore', 'minecraft:iron_ore']
+    #   {'minecraft:diamond_ore': 10, 'minecraft:iron_ore': 5, 'minecraft:coal_ore': 1}
+    # A state like 'minecraft:wheat[age=7]' only matches blocks with that property
     'target_block': 'minecraft:iron_block',
     
     # If True, match blocks ignoring their state (useful for crops with age)
@@ -28,13 +49,51 @@ CONFIG = {
     # Lower = faster, Higher = slower and smoother
     'rotation_duration': 1.5,
     
-    # Smoothness: number of steps for interpolation
+    # Smoothness: maximum number of steps for interpolation
     # Higher = smoother but more CPU intensive (30-120 recommended)
     'rotation_steps': 90,
     
+    # Rotation profile: rotations of rotation_full_angle degrees or more take
+    # rotation_duration, smaller ones scale down to rotation_min_duration seconds.
+    # Steps are spread about rotation_degrees_per_step apart, so a small
+    # correction only needs a few camera updates
+    'rotation_full_angle': 15,
+    'rotation_min_duration': 0.15,
+    'rotation_degrees_per_step': 1.0,
+    
+    # Easing curve of a rotation: 'smoothstep', 'minimum_jerk' (smoother start
+    # and stop), 'sine' or 'linear'
+    'rotation_curve': 'smoothstep',
+    
+    # Maximum camera updates per second, ideally your frame rate.
+    # Steps that would land in the same frame are skipped (they would not be visible)
+    'max_orientation_rate': 60,
+    
+    # If True, update the camera once per rendered frame instead of on a timer
+    # (needs a Minescript version with render events)
+    'sync_rotation_to_render': False,
+    
     # Cooldown in seconds before moving to next block
     'block_cooldown': 0.8,
     
+    # If True, the next target is planned while the current block breaks and the
+    # camera moves on as soon as the break is confirmed (skips break_delay and
+    # block_cooldown)
+    'pipeline_mining': False,
+    
+    # If True, a second worker thread brings the scan cache up to date while the
+    # camera rotates (new positions within reach, the target and its neighbours)
+    # and plans the next target during block_cooldown, so scans after a break
+    # need no getblocklist round trip. Off by default: it runs minescript calls
+    # from two threads at once, try it with the benchmark first
+    'prefetch_scan': False,
+    
+    # If True, planned targets the crosshair crosses while rotating to the next
+    # block are broken on the way (stop, break, continue) and taken off the plan.
+    # The path is checked every sweep_sample_angle degrees against the scan cache
+    'sweep_breaking': False,
+    'sweep_sample_angle': 0.5,
+    
     # If True, continuously scan for new blocks after completing a batch
     # Will keep running until no new blocks are found
     'continuous_scan': True,
@@ -44,75 +103,854 @@ CONFIG = {
     # See: https://www.glfw.org/docs/3.3/group__keys.html
     'rescan_key': 89,  # Y key
     
+    # Seconds without any event after which the script checks whether a GUI is open.
+    # GUIs opened with a key are noticed right away; this catches the others
+    # (e.g. the death screen) and is the only work done while the script is idle
+    'screen_poll_interval': 1.0,
+    
+    # If True, listen for block update and chunk events so blocks changed by
+    # others (players, water, regrowth) are picked up without rescanning
+    'listen_world_changes': True,
+    
+    # If True, once nothing is left within reach the script indexes target blocks
+    # in a wider region (chunk by chunk) and walks to the next best cluster
+    'walk_to_clusters': False,
+    
+    # Region indexed for walk_to_clusters: horizontal radius around the player
+    # and vertical range relative to the player's feet (in blocks). walk_to
+    # only moves horizontally, so the range is capped to +-search_distance
+    # (rounded down); a smaller range still narrows the scan
+    'region_radius': 32,
+    'region_height': (-4, 4),
+    
+    # Blocks within this distance of each other form one cluster
+    'cluster_radius': 3,
+    
+    # Walking speed (blocks per second) used to rank clusters by blocks per travel second
+    'walk_speed': 4.3,
+    
+    # Give up walking to a cluster after this many seconds
+    'max_walk_time': 20.0,
+    
+    # Folder to keep scanned blocks and confirmed breaks (or, with break_blocks
+    # off, the blocks looked at) in, per world and chunk, so a restarted job
+    # resumes without rescanning. Only the first session loads it, the rescan
+    # key starts from scratch. None = off
+    'disk_cache_dir': None,
+    
+    # Saved blocks and breaks older than this many seconds are ignored on resume
+    # (blocks are queried again, processed positions can be targets again)
+    'disk_cache_max_age': 600,
+    
+    # Seconds between saves of the disk cache (it is also saved when the script ends)
+    'disk_cache_save_interval': 30,
+    
     # If True, visit blocks based on angular proximity (more realistic)
     # If False, visit blocks based on distance
     'use_cluster_mode': True,
     
+    # If True, skip blocks hidden behind other blocks (checked against the
+    # blocks already scanned, no extra requests) and aim at a visible face
+    # when the centre of a block is covered
+    'occlusion_check': True,
+    
+    # Time in seconds the cluster mode planner may spend shortening the
+    # visit order (total camera rotation) after its initial greedy pass
+    'planner_time_budget': 0.05,
+    
     # If True, break blocks after looking at them
     'break_blocks': True,
     
     # Pause in seconds after looking at block before breaking it
     'break_delay': 0.3,
     
-    # Time in seconds to hold attack button (for breaking blocks)
-    # Increase this for blocks that take longer to break
+    # Time in seconds to hold attack before first checking if the block is gone.
+    # Only used until the break time of a block type has been learned
     'break_hold_time': 0.1,
+    
+    # How often (seconds) to check whether the block being broken is gone
+    'break_poll_interval': 0.05,
+    
+    # Give up on a block if it isn't gone after this many seconds of attacking
+    'break_timeout': 5.0,
+    
+    # File to write timing and call-count summaries to (JSON lines, or CSV if
+    # it ends in .csv). None disables the file; counting itself is always on
+    'metrics_file': None,
+    
+    # Seconds between summaries written to metrics_file
+    'metrics_interval': 60.0,
+    
+    # Chat messages below this level ('debug', 'info', 'warning', 'error') are
+    # only counted and summed up in chat every log_summary_interval seconds.
+    # Use 'debug' to see every scan and block again
+    'log_level': 'info',
+    'log_summary_interval': 60.0,
+    
+    # At most this many chat messages per second, the rest are held back
+    # (counted in the next summary)
+    'log_max_per_second': 5,
+    
+    # File every message is appended to, whatever its level (None = no file)
+    'log_file': None,
 }
 # ============================================
 
-def find_all_blocks(max_distance=5, block_type='minecraft:iron_block', ignore_state=False):
-    """Find all blocks of specified type within max_distance (player hit range)."""
-    player_pos = minescript.player_position()
+# PatternFarmAutomation.py carries cut-down copies of _CountedModule,
+# Instrumentation and ChatLog (each script is used on its own, so they are
+# mirrored on purpose). Keep behaviour changes in step with that file.
+
+class _Phase:
+    """Context manager that charges the time spent inside it to one phase."""
+    __slots__ = ('metrics', 'name')
+    
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+    
+    def __enter__(self):
+        self.metrics._enter(self.name)
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.metrics._exit()
+        return False
+
+class _CountedModule:
+    """Forwards to a module and counts calls to its functions by name."""
+    
+    def __init__(self, module, counts):
+        self._module = module
+        self._counts = counts
+    
+    def __getattr__(self, name):
+        attr = getattr(self._module, name)
+        if callable(attr) and not isinstance(attr, type):
+            function, counts = attr, self._counts
+            
+            def counted(*args, **kwargs):
+                counts[name] = counts.get(name, 0) + 1
+                return function(*args, **kwargs)
+            
+            attr = counted
+        setattr(self, name, attr)  # Later lookups skip __getattr__
+        return attr
+
+class Instrumentation:
+    """
+    Per-phase timers, minescript call counters and free-form counters, cheap
+    enough to leave on. Phases are exclusive: time in a nested phase is not
+    counted for the outer one. Summaries (totals since start) are appended to
+    a file every interval seconds, as JSON lines or as CSV if the name ends in .csv.
+    """
+    
+    def __init__(self):
+        self.path = None
+        self.interval = 60.0
+        self.reset()
+    
+    def reset(self):
+        self.phase_seconds = {}
+        self.phase_counts = {}
+        self.call_counts = {}
+        self.counters = {}
+        self._stack = []  # [name, start] of the active phases
+        self.started = self.last_flush = time.perf_counter()
+    
+    def configure(self, path, interval):
+        """Set where and how often summaries are written (path None = never)."""
+        self.path = path
+        self.interval = interval
+    
+    def phase(self, name):
+        """Use as `with METRICS.phase('scan'):` to time a block of code."""
+        return _Phase(self, name)
+    
+    def _enter(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            self._charge(self._stack[-1], now)
+        self._stack.append([name, now])
+        self.phase_counts[name] = self.phase_counts.get(name, 0) + 1
+    
+    def _exit(self):
+        now = time.perf_counter()
+        self._charge(self._stack.pop(), now)
+        if self._stack:
+            self._stack[-1][1] = now
+    
+    def _charge(self, frame, now):
+        self.phase_seconds[frame[0]] = self.phase_seconds.get(frame[0], 0.0) + now - frame[1]
+        frame[1] = now
+    
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def count_calls(self, module):
+        """Wrap a module so every function call on it is counted."""
+        return _CountedModule(module, self.call_counts)
+    
+    def summary(self):
+        return {
+            'time': time.time(),
+            'elapsed': time.perf_counter() - self.started,
+            'phases': {name: {'seconds': round(seconds, 4), 'count': self.phase_counts.get(name, 0)}
+                       for name, seconds in self.phase_seconds.items()},
+            'calls': dict(self.call_counts),
+            'counters': dict(self.counters),
+        }
+    
+    def maybe_flush(self):
+        """Write a summary if the interval has passed."""
+        if self.path and time.perf_counter() - self.last_flush >= self.interval:
+            self.flush()
+    
+    def flush(self):
+        """Append a summary to the metrics file."""
+        self.last_flush = time.perf_counter()
+        if not self.path:
+            return
+        summary = self.summary()
+        with open(self.path, 'a') as f:
+            if self.path.endswith('.csv'):
+                stamp = f"{summary['time']:.3f},{summary['elapsed']:.3f}"
+                for name, phase in summary['phases'].items():
+                    f.write(f"{stamp},phase,{name},{phase['count']},{phase['seconds']}\n")
+                for kind in ('calls', 'counters'):
+                    for name, count in summary[kind].items():
+                        f.write(f"{stamp},{kind[:-1]},{name},{count},\n")
+            else:
+                f.write(json.dumps(summary) + "\n")
+
+# Shared instance used throughout the script
+METRICS = Instrumentation()
+
+class ChatLog:
+    """
+    Leveled logging instead of one chat message per step. Messages at the
+    chat level or above are echoed (at most max_per_second, the rest are held
+    back); lower ones are only counted by key and reported in a summary every
+    summary_interval seconds. Every message is kept in a ring buffer of recent
+    lines (see echo_recent) and, if a file is set, appended to it in batches.
+    """
+    
+    LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+    
+    def __init__(self, prefix=''):
+        self.prefix = prefix
+        self.lock = threading.Lock()  # Messages come from the event loop and worker threads
+        self.configure()
+    
+    def configure(self, level='info', path=None, summary_interval=60.0, max_per_second=5, buffer_size=200):
+        self.level = self.LEVELS[level]
+        self.path = path
+        self.summary_interval = summary_interval
+        self.max_per_second = max_per_second
+        self.recent = deque(maxlen=buffer_size)  # (time, level, message) of the latest messages
+        self.hidden = {}  # Key -> messages not echoed since the last summary
+        self.held_back = 0  # Messages over the chat rate since the last summary
+        self.pending = []  # Lines not written to the file yet
+        self.window_start = 0.0
+        self.window_count = 0
+        self.last_summary = time.perf_counter()
+    
+    def debug(self, message, key='debug'):
+        self.log('debug', message, key)
+    
+    def info(self, message, key='info'):
+        self.log('info', message, key)
+    
+    def warning(self, message, key='warning'):
+        self.log('warning', message, key)
+    
+    def error(self, message, key='error'):
+        self.log('error', message, key)
+    
+    def log(self, level, message, key=None):
+        """Log a message; key groups it in summaries (defaults to the level)."""
+        now = time.perf_counter()
+        echo = False
+        with self.lock:
+            self.recent.append((now, level, message))
+            if self.path:
+                self.pending.append(f"{time.strftime('%H:%M:%S')} {level.upper():<7} {message}\n")
+            
+            if self.LEVELS[level] < self.level:
+                key = key or level
+                self.hidden[key] = self.hidden.get(key, 0) + 1
+            else:
+                # Chat rate limit, errors always get through
+                if now - self.window_start >= 1.0:
+                    self.window_start = now
+                    self.window_count = 0
+                if self.window_count < self.max_per_second or level == 'error':
+                    self.window_count += 1
+                    echo = True
+                else:
+                    self.held_back += 1
+        
+        if echo:
+            minescript.echo(self.prefix + message)
+        self.maybe_summarize(now)
+    
+    def echo_recent(self, level='warning', count=5):
+        """Echo the latest messages at level or above again, e.g. the warnings of a run at its end."""
+        with self.lock:
+            lines = [message for _, line_level, message in self.recent
+                     if self.LEVELS[line_level] >= self.LEVELS[level]][-count:]
+        if lines:
+            minescript.echo(f"{self.prefix}Last {len(lines)} messages at {level} or above:")
+            for message in lines:
+                minescript.echo(self.prefix + "  " + message.strip())
+    
+    def maybe_summarize(self, now=None):
+        """Echo a summary of hidden messages and write the file if the interval has passed."""
+        now = time.perf_counter() if now is None else now
+        if self.summary_interval and now - self.last_summary >= self.summary_interval:
+            self.summarize()
+    
+    def summarize(self):
+        """Echo counts of the messages that weren't shown and write pending file lines."""
+        with self.lock:
+            elapsed = time.perf_counter() - self.last_summary
+            self.last_summary = time.perf_counter()
+            parts = [f"{count} {key}" for key, count in sorted(self.hidden.items(), key=lambda item: -item[1])]
+            if self.held_back:
+                parts.append(f"{self.held_back} held back")
+            self.hidden.clear()
+            self.held_back = 0
+            lines, self.pending = self.pending, []
+        
+        if parts:
+            minescript.echo(f"{self.prefix}[last {elapsed:.0f}s] " + ", ".join(parts))
+        if lines:
+            with open(self.path, 'a') as f:
+                f.writelines(lines)
+
+# Shared instance used throughout the script
+LOG = ChatLog()
+
+class ScanCache:
+    """
+    Remembers block types by position between scans.
+    Only positions that are unknown (new shell after moving) or were
+    invalidated (e.g. the block just broken) are sent to getblocklist.
+    """
+    
+    def __init__(self, margin=2):
+        self.blocks = {}  # (x, y, z) -> full block type string
+        self.margin = margin  # Extra blocks kept around the reach sphere
+        self.center = None  # Block position the cache was last pruned around
+    
+    def clear(self):
+        """Forget everything (used when a new scan session starts)."""
+        self.blocks.clear()
+        self.center = None
+    
+    def invalidate(self, position):
+        """Force a position to be re-queried on the next scan."""
+        self.blocks.pop(tuple(position), None)
+    
+    def update(self, position, block_type):
+        """Store a block type reported by a block update event (known positions only)."""
+        position = tuple(position)
+        if position in self.blocks:
+            self.blocks[position] = block_type
+    
+    def invalidate_area(self, x_min, z_min, x_max, z_max):
+        """Force every cached position in a column range (e.g. a chunk) to be re-queried."""
+        stale = [pos for pos in self.blocks
+                 if x_min <= pos[0] <= x_max and z_min <= pos[2] <= z_max]
+        for pos in stale:
+            del self.blocks[pos]
+    
+    def prune(self, player_pos, max_distance):
+        """Drop entries that are well outside reach after the player moved."""
+        center = (math.floor(player_pos[0]), math.floor(player_pos[1]), math.floor(player_pos[2]))
+        if center == self.center:
+            return
+        self.center = center
+        
+        px, py, pz = player_pos
+        limit = (max_distance + self.margin) ** 2
+        stale = [pos for pos in self.blocks
+                 if (pos[0] - px)**2 + (pos[1] - py)**2 + (pos[2] - pz)**2 > limit]
+        for pos in stale:
+            del self.blocks[pos]
+    
+    def fetch(self, positions):
+        """
+        Make sure every position has a known block type.
+        
+        Returns:
+            Number of positions that had to be queried
+        """
+        missing = [pos for pos in positions if pos not in self.blocks]
+        if missing:
+            block_types = minescript.getblocklist([list(pos) for pos in missing])
+            for pos, found_block_type in zip(missing, block_types):
+                self.blocks[pos] = found_block_type
+        return len(missing)
+    
+    def refresh(self, positions):
+        """
+        Query positions again even if they are known.
+        
+        Returns:
+            Positions whose block type changed since they were cached
+        """
+        positions = [tuple(pos) for pos in positions]
+        block_types = minescript.getblocklist([list(pos) for pos in positions])
+        changed = []
+        for pos, found_block_type in zip(positions, block_types):
+            if pos in self.blocks and self.blocks[pos] != found_block_type:
+                changed.append(pos)
+            self.blocks[pos] = found_block_type
+        return changed
+
+class DiskScanCache:
+    """
+    Optional on-disk copy of the scan cache and of confirmed positions
+    (blocks broken, or looked at in look-only mode, see MiningSession).
+    
+    One file per chunk in a folder per world. A file holds a small header
+    (magic, palette size), a palette of block type strings and packed arrays:
+    int64 positions (see pack_position) with uint16 palette indices and the
+    float64 time each block type was saved, then the int64 confirmed
+    positions with their times. Arrays are stored little-endian.
+    Every entry keeps the time it was first saved until its value changes,
+    so it expires max_age after it was actually seen.
+    """
+    
+    MAGIC = b'MSC2'
+    
+    def __init__(self, directory, world_key, max_age):
+        safe_key = re.sub(r'[^A-Za-z0-9_.-]+', '_', world_key)
+        self.directory = os.path.join(directory, safe_key)
+        self.max_age = max_age
+        self.saved_blocks = {}  # (x, y, z) -> (block type, save time) as on disk
+        self.saved_confirmed = {}  # (x, y, z) -> save time as on disk
+    
+    def _chunk_path(self, chunk_x, chunk_z):
+        return os.path.join(self.directory, f"c.{chunk_x}.{chunk_z}.bin")
+    
+    @staticmethod
+    def _array(typecode, data=b''):
+        values = array(typecode)
+        values.frombytes(data)
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+    
+    @staticmethod
+    def _bytes(values):
+        if sys.byteorder == 'big':
+            values = array(values.typecode, values)
+            values.byteswap()
+        return values.tobytes()
+    
+    def _read(self, path):
+        """Read one chunk file: ({position: (block type, save time)}, {confirmed position: save time})."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != self.MAGIC:
+            raise ValueError(f"not a scan cache file: {path}")
+        (palette_size,) = struct.unpack_from('<H', data, 4)
+        offset = 6
+        palette = []
+        for _ in range(palette_size):
+            (length,) = struct.unpack_from('<H', data, offset)
+            palette.append(data[offset + 2:offset + 2 + length].decode())
+            offset += 2 + length
+        
+        (count,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        positions = self._array('q', data[offset:offset + count * 8])
+        offset += count * 8
+        indices = self._array('H', data[offset:offset + count * 2])
+        offset += count * 2
+        times = self._array('d', data[offset:offset + count * 8])
+        offset += count * 8
+        (confirmed_count,) = struct.unpack_from('<I', data, offset)
+        offset += 4
+        confirmed = self._array('q', data[offset:offset + confirmed_count * 8])
+        offset += confirmed_count * 8
+        confirmed_times = self._array('d', data[offset:offset + confirmed_count * 8])
+        if len(times) != count or len(confirmed_times) != confirmed_count:
+            raise ValueError(f"truncated scan cache file: {path}")
+        
+        blocks = {unpack_position(packed): (palette[index], saved_at)
+                  for packed, index, saved_at in zip(positions, indices, times)}
+        return blocks, {unpack_position(packed): saved_at for packed, saved_at in zip(confirmed, confirmed_times)}
+    
+    def _write(self, path, blocks, confirmed):
+        palette = {}
+        positions = array('q')
+        indices = array('H')
+        times = array('d')
+        for position, (block_type, saved_at) in blocks.items():
+            positions.append(pack_position(*position))
+            indices.append(palette.setdefault(block_type, len(palette)))
+            times.append(saved_at)
+        
+        parts = [self.MAGIC, struct.pack('<H', len(palette))]
+        for block_type in palette:
+            encoded = block_type.encode()
+            parts.append(struct.pack('<H', len(encoded)) + encoded)
+        parts.append(struct.pack('<I', len(positions)))
+        parts.append(self._bytes(positions))
+        parts.append(self._bytes(indices))
+        parts.append(self._bytes(times))
+        parts.append(struct.pack('<I', len(confirmed)))
+        parts.append(self._bytes(array('q', (pack_position(*p) for p in confirmed))))
+        parts.append(self._bytes(array('d', confirmed.values())))
+        
+        # Write to a temporary file first so a crash never leaves half a file
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(temp_path, path)
+    
+    def start_fresh(self):
+        """Forget what was loaded, so everything saved from now on counts as just scanned."""
+        self.saved_blocks.clear()
+        self.saved_confirmed.clear()
+    
+    def load_into(self, scan_cache, confirmed_blocks):
+        """
+        Load every saved chunk file of this world (the scan prunes what is out
+        of reach). Only entries saved less than max_age ago are restored, into
+        the scan cache and confirmed_blocks (position -> block type there, if
+        loaded too). Older ones are simply queried again.
+        
+        Returns:
+            (blocks loaded, confirmed positions loaded)
+        """
+        self.start_fresh()
+        if not os.path.isdir(self.directory):
+            return 0, 0
+        
+        loaded_blocks = loaded_confirmed = 0
+        oldest = time.time() - self.max_age
+        for name in os.listdir(self.directory):
+            if not name.endswith('.bin'):
+                continue
+            try:
+                blocks, confirmed = self._read(os.path.join(self.directory, name))
+            except (OSError, ValueError, struct.error, IndexError) as e:
+                LOG.warning(f"  ✗ Skipping unreadable cache file {name}: {e}")
+                continue
+            for position, (block_type, saved_at) in blocks.items():
+                if saved_at >= oldest:
+                    scan_cache.blocks[position] = block_type
+                    self.saved_blocks[position] = (block_type, saved_at)
+                    loaded_blocks += 1
+            for position, saved_at in confirmed.items():
+                if saved_at >= oldest:
+                    confirmed_blocks[position] = scan_cache.blocks.get(position)
+                    self.saved_confirmed[position] = saved_at
+                    loaded_confirmed += 1
+        return loaded_blocks, loaded_confirmed
+    
+    def save(self, scan_cache, confirmed_blocks):
+        """
+        Write the in-memory state of every chunk the scan cache holds
+        positions of, replacing what was saved for it: positions dropped from
+        memory (broken, changed or pruned) are dropped from the file too.
+        Chunks with nothing in memory keep their file as it is. Entries that
+        are unchanged since they were saved keep their save time.
+        """
+        now = time.time()
+        by_chunk = {}
+        for position, block_type in scan_cache.blocks.items():
+            saved = self.saved_blocks.get(position)
+            saved_at = saved[1] if saved is not None and saved[0] == block_type else now
+            by_chunk.setdefault((position[0] >> 4, position[2] >> 4), ({}, {}))[0][position] = (block_type, saved_at)
+        for position in confirmed_blocks:
+            saved_at = self.saved_confirmed.get(position, now)
+            by_chunk.setdefault((position[0] >> 4, position[2] >> 4), ({}, {}))[1][position] = saved_at
+        
+        os.makedirs(self.directory, exist_ok=True)
+        for (chunk_x, chunk_z), (blocks, confirmed) in by_chunk.items():
+            self._write(self._chunk_path(chunk_x, chunk_z), blocks, confirmed)
+            self.saved_blocks.update(blocks)
+            self.saved_confirmed.update(confirmed)
+
+# Offsets that can be within reach, cached per radius (see get_reach_offsets)
+_REACH_OFFSETS = {}
+
+def get_reach_offsets(max_distance):
+    """
+    Get the integer block offsets (relative to the block the player stands in)
+    that can be within max_distance for any position inside that block.
+    Computed once per radius and cached, as a NumPy array if available.
+    """
+    offsets = _REACH_OFFSETS.get(max_distance)
+    if offsets is not None:
+        return offsets
+    
+    radius = int(math.ceil(max_distance)) + 1
+    limit = max_distance ** 2
+    offsets = []
+    for ox in range(-radius, radius + 1):
+        # Closest distance along this axis from the player's block (0..1)
+        gx = -ox if ox < 0 else max(0, ox - 1)
+        for oy in range(-radius, radius + 1):
+            gy = -oy if oy < 0 else max(0, oy - 1)
+            for oz in range(-radius, radius + 1):
+                gz = -oz if oz < 0 else max(0, oz - 1)
+                if gx*gx + gy*gy + gz*gz <= limit:
+                    offsets.append((ox, oy, oz))
+    
+    if np is not None:
+        offsets = np.array(offsets, dtype=np.int64)
+    _REACH_OFFSETS[max_distance] = offsets
+    return offsets
+
+def get_reach_positions(player_pos, max_distance):
+    """
+    Translate the cached reach offsets to the player position.
+    
+    Returns:
+        (positions, squared_distances) for every block within max_distance
+    """
     px, py, pz = player_pos
+    bx, by, bz = math.floor(px), math.floor(py), math.floor(pz)
+    fx, fy, fz = px - bx, py - by, pz - bz
+    limit = max_distance ** 2
+    offsets = get_reach_offsets(max_distance)
     
-    search_mode = "with state ignored" if ignore_state else "exact match"
-    minescript.echo(f"Searching for {block_type} within {max_distance} blocks ({search_mode})...")
+    if np is not None:
+        # Vectorized: squared distance of every offset in one pass, then mask
+        delta = offsets - np.array([fx, fy, fz])
+        squared = np.einsum('ij,ij->i', delta, delta)
+        mask = squared <= limit
+        positions = offsets[mask] + np.array([bx, by, bz], dtype=np.int64)
+        return list(map(tuple, positions.tolist())), squared[mask].tolist()
     
-    # Search in a smaller cube around the player (within reach)
-    search_range = max_distance
-    blocks_found = []
+    positions = []
+    squared_distances = []
+    for ox, oy, oz in offsets:
+        squared = (ox - fx)**2 + (oy - fy)**2 + (oz - fz)**2
+        if squared <= limit:
+            positions.append((bx + ox, by + oy, bz + oz))
+            squared_distances.append(squared)
+    return positions, squared_distances
+
+def parse_block_state(block_type):
+    """
+    Split a block string like 'minecraft:wheat[age=7]' into its base name
+    and a dict of state properties.
+    """
+    base, _, state = block_type.partition('[')
+    properties = {}
+    if state:
+        for prop in state.rstrip(']').split(','):
+            key, _, value = prop.partition('=')
+            properties[key.strip()] = value.strip()
+    return base, properties
+
+class BlockMatcher:
+    """
+    Matches scanned block strings against one or more target blocks.
+    
+    Targets are compiled once into a table of interned base names with an
+    optional state predicate and a priority. Results are memoized per full
+    block string, so matching a scanned cell costs one dict lookup.
+    """
+    
+    def __init__(self, targets, ignore_state=False):
+        # Accept a single ID, a list (earlier = higher priority) or a dict of priorities
+        if isinstance(targets, str):
+            targets = {targets: 0}
+        elif not isinstance(targets, dict):
+            targets = {target: len(targets) - i for i, target in enumerate(targets)}
+        
+        self.targets = targets
+        self.ignore_state = ignore_state
+        self._by_base = {}  # base name -> [(required properties or None, priority)]
+        self._results = {}  # full block string -> priority or None
+        
+        for target, priority in targets.items():
+            base, properties = parse_block_state(target)
+            if ignore_state:
+                required = {}  # Any state matches
+            elif properties:
+                required = properties  # These properties must match
+            else:
+                required = None  # Exact match (block without state)
+            self._by_base.setdefault(sys.intern(base), []).append((required, priority))
+    
+    def describe(self):
+        """Readable list of targets for chat output."""
+        return ", ".join(self.targets)
+    
+    def match(self, block_type):
+        """Get the priority of a matching block, or None if it isn't a target."""
+        try:
+            return self._results[block_type]
+        except KeyError:
+            pass
+        
+        result = None
+        base, properties = parse_block_state(block_type)
+        for required, priority in self._by_base.get(base, ()):
+            if required is None:
+                is_match = not properties
+            else:
+                is_match = all(properties.get(key) == value for key, value in required.items())
+            if is_match and (result is None or priority > result):
+                result = priority
+        
+        self._results[sys.intern(block_type)] = result
+        return result
+
+def find_all_blocks(max_distance=5, block_type='minecraft:iron_block', ignore_state=False, cache=None):
+    """
+    Find all blocks of specified type within max_distance (player hit range).
+    block_type can be anything CONFIG['target_block'] accepts or a BlockMatcher.
+    If a ScanCache is given, only positions it doesn't know yet are queried.
+    """
+    player_pos = minescript.player_position()
     
-    # Generate list of positions to check
-    positions_to_check = []
-    for x in range(int(px - search_range), int(px + search_range + 1)):
-        for y in range(int(py - search_range), int(py + search_range + 1)):
-            for z in range(int(pz - search_range), int(pz + search_range + 1)):
-                distance = math.sqrt((x - px)**2 + (y - py)**2 + (z - pz)**2)
-                if distance <= max_distance:
-                    positions_to_check.append([x, y, z])
+    if isinstance(block_type, BlockMatcher):
+        matcher = block_type
+    else:
+        matcher = BlockMatcher(block_type, ignore_state)
     
-    minescript.echo(f"Checking {len(positions_to_check)} positions...")
+    search_mode = "with state ignored" if matcher.ignore_state else "exact match"
+    LOG.debug(f"Searching for {matcher.describe()} within {max_distance} blocks ({search_mode})...", 'scan')
+    
+    blocks_found = []
+    
+    # Positions within reach (offsets are precomputed once per radius)
+    positions_to_check, squared_distances = get_reach_positions(player_pos, max_distance)
     
-    # Use getblocklist for batch checking (much faster)
     if positions_to_check:
-        block_types = minescript.getblocklist(positions_to_check)
+        if cache is not None:
+            # Only query positions the cache doesn't know about
+            cache.prune(player_pos, max_distance)
+            queried = cache.fetch(positions_to_check)
+            LOG.debug(f"Checking {len(positions_to_check)} positions ({queried} queried)...", 'scan')
+            block_types = [cache.blocks[pos] for pos in positions_to_check]
+        else:
+            LOG.debug(f"Checking {len(positions_to_check)} positions...", 'scan')
+            # Use getblocklist for batch checking (much faster)
+            block_types = minescript.getblocklist([list(pos) for pos in positions_to_check])
         
+        match = matcher.match
         for i, found_block_type in enumerate(block_types):
-            # Check if block matches
-            is_match = False
-            
-            if ignore_state:
-                # Extract base block name (before '[' if present)
-                found_base = found_block_type.split('[')[0]
-                target_base = block_type.split('[')[0]
-                is_match = (found_base == target_base)
-            else:
-                # Exact match
-                is_match = (found_block_type == block_type)
-            
-            if is_match:
-                x, y, z = positions_to_check[i]
-                distance = math.sqrt((x - px)**2 + (y - py)**2 + (z - pz)**2)
+            priority = match(found_block_type)
+            if priority is not None:
                 blocks_found.append({
-                    'position': (x, y, z),
-                    'distance': distance,
-                    'full_type': found_block_type  # Store the full block type with state
+                    'position': positions_to_check[i],
+                    'distance': math.sqrt(squared_distances[i]),
+                    'full_type': found_block_type,  # Store the full block type with state
+                    'priority': priority
                 })
         
-        minescript.echo(f"Search complete. Found {len(blocks_found)} block(s)")
+        LOG.debug(f"Search complete. Found {len(blocks_found)} block(s)", 'scan')
     
     return blocks_found
 
+# Blocks the crosshair passes through (base names)
+PASSABLE_BLOCKS = {
+    'minecraft:air', 'minecraft:cave_air', 'minecraft:void_air',
+    'minecraft:water', 'minecraft:lava',
+}
+
+# Height of the player's eyes above their feet
+EYE_HEIGHT = 1.62
+
+def raycast_first_block(origin, end, blocks):
+    """
+    Walk the voxels crossed by the segment origin -> end (DDA) and return the
+    first one that isn't passable according to the blocks dict, or None.
+    Positions missing from the dict are treated as passable, and the voxel
+    the ray starts in is skipped.
+    """
+    ox, oy, oz = origin
+    dx, dy, dz = end[0] - ox, end[1] - oy, end[2] - oz
+    x, y, z = math.floor(ox), math.floor(oy), math.floor(oz)
+    end_cell = (math.floor(end[0]), math.floor(end[1]), math.floor(end[2]))
+    
+    def axis_setup(position, cell, delta):
+        # Step direction, ray parameter of the first boundary, parameter per voxel
+        if delta > 0:
+            return 1, (cell + 1 - position) / delta, 1 / delta
+        if delta < 0:
+            return -1, (cell - position) / delta, -1 / delta
+        return 0, float('inf'), float('inf')
+    
+    step_x, t_max_x, t_delta_x = axis_setup(ox, x, dx)
+    step_y, t_max_y, t_delta_y = axis_setup(oy, y, dy)
+    step_z, t_max_z, t_delta_z = axis_setup(oz, z, dz)
+    
+    while (x, y, z) != end_cell:
+        # Step into the next voxel along the axis whose boundary is closest
+        if t_max_x <= t_max_y and t_max_x <= t_max_z:
+            if t_max_x > 1:
+                break
+            x += step_x
+            t_max_x += t_delta_x
+        elif t_max_y <= t_max_z:
+            if t_max_y > 1:
+                break
+            y += step_y
+            t_max_y += t_delta_y
+        else:
+            if t_max_z > 1:
+                break
+            z += step_z
+            t_max_z += t_delta_z
+        
+        block_type = blocks.get((x, y, z))
+        if block_type is not None and block_type.partition('[')[0] not in PASSABLE_BLOCKS:
+            return (x, y, z)
+    
+    return None
+
+# Face normals of a block, used to find a visible point on it
+BLOCK_FACES = ((1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1))
+
+def find_visible_point(position, eye_pos, blocks):
+    """
+    Find a point on the block at position that the crosshair can reach from
+    eye_pos without hitting another block first (according to blocks).
+    
+    Returns:
+        (x, y, z) point to aim at (block centre if visible, else a face centre),
+        or None if the block is hidden
+    """
+    x, y, z = position
+    center = (x + 0.5, y + 0.5, z + 0.5)
+    if raycast_first_block(eye_pos, center, blocks) == position:
+        return center
+    
+    # Try the centres of faces that point towards the eye and aren't covered
+    for nx, ny, nz in BLOCK_FACES:
+        to_eye = (eye_pos[0] - center[0]) * nx + (eye_pos[1] - center[1]) * ny + (eye_pos[2] - center[2]) * nz
+        if to_eye <= 0.5:
+            continue  # Face points away from the eye
+        neighbour = blocks.get((x + nx, y + ny, z + nz))
+        if neighbour is not None and neighbour.partition('[')[0] not in PASSABLE_BLOCKS:
+            continue  # Face is covered
+        
+        # Aim just inside the face so the ray ends in this block
+        point = (center[0] + nx * 0.49, center[1] + ny * 0.49, center[2] + nz * 0.49)
+        if raycast_first_block(eye_pos, point, blocks) == position:
+            return point
+    
+    return None
+
+def block_aim_point(block):
+    """Point to look at for a block dict (visible face point or centre)."""
+    aim_point = block.get('aim_point')
+    if aim_point is None:
+        x, y, z = block['position']
+        aim_point = (x + 0.5, y + 0.5, z + 0.5)
+    return aim_point
+
 def calculate_look_angles(player_pos, target_pos):
     """Calculate yaw and pitch to look at target position from player position."""
     px, py, pz = player_pos
@@ -120,7 +958,7 @@ def calculate_look_angles(player_pos, target_pos):
     
     # Calculate differences
     dx = tx - px
-    dy = ty - (py + 1.62)  # Add player eye height
+    dy = ty - (py + EYE_HEIGHT)  # Add player eye height
     dz = tz - pz
     
     # Calculate distance in horizontal plane
@@ -136,106 +974,420 @@ def calculate_look_angles(player_pos, target_pos):
 
 def normalize_angle(angle):
     """Normalize angle to be between -180 and 180."""
-    while angle > 180:
-        angle -= 360
-    while angle < -180:
-        angle += 360
-    return angle
+    return (angle + 180.0) % 360.0 - 180.0
 
 def angle_difference(current, target):
     """Calculate the shortest difference between two angles."""
     diff = normalize_angle(target - current)
     return diff
 
-def calculate_angular_distance(yaw1, pitch1, yaw2, pitch2):
+def look_vector(yaw, pitch):
+    """Unit vector (x, y, z) of a look direction given in degrees."""
+    yaw_rad = math.radians(yaw)
+    pitch_rad = math.radians(pitch)
+    return (-math.sin(yaw_rad) * math.cos(pitch_rad), -math.sin(pitch_rad), math.cos(yaw_rad) * math.cos(pitch_rad))
+
+class LookDirections:
     """
-    Calculate angular distance between two orientations.
-    Returns a value representing how far apart two look directions are.
+    Look directions of a set of targets, computed once and kept as arrays
+    (NumPy when available, plain lists otherwise) of yaw and pitch. Rotation
+    distances between the targets are computed from these in one batch
+    instead of per pair.
     """
-    # Convert to radians
-    yaw1_rad = math.radians(yaw1)
-    pitch1_rad = math.radians(pitch1)
-    yaw2_rad = math.radians(yaw2)
-    pitch2_rad = math.radians(pitch2)
     
-    # Convert to 3D unit vectors
-    x1 = math.cos(pitch1_rad) * math.sin(yaw1_rad)
-    y1 = math.sin(pitch1_rad)
-    z1 = math.cos(pitch1_rad) * math.cos(yaw1_rad)
+    def __init__(self, yaw, pitch):
+        if np is not None:
+            self.yaw = np.asarray(yaw, dtype=float)
+            self.pitch = np.asarray(pitch, dtype=float)
+        else:
+            self.yaw = list(yaw)
+            self.pitch = list(pitch)
     
-    x2 = math.cos(pitch2_rad) * math.sin(yaw2_rad)
-    y2 = math.sin(pitch2_rad)
-    z2 = math.cos(pitch2_rad) * math.cos(yaw2_rad)
+    @classmethod
+    def from_points(cls, player_pos, points):
+        """Look directions from the player's eyes to each (x, y, z) point, in one pass."""
+        px, py, pz = player_pos
+        eye_y = py + EYE_HEIGHT
+        if np is not None and points:
+            offsets = np.asarray(points, dtype=float) - (px, eye_y, pz)
+            horizontal = np.hypot(offsets[:, 0], offsets[:, 2])
+            yaw = np.degrees(np.arctan2(-offsets[:, 0], offsets[:, 2]))
+            pitch = -np.degrees(np.arctan2(offsets[:, 1], horizontal))
+            return cls(yaw, pitch)
+        
+        yaw, pitch = [], []
+        for tx, ty, tz in points:
+            dx, dy, dz = tx - px, ty - eye_y, tz - pz
+            horizontal = math.hypot(dx, dz)
+            yaw.append(math.degrees(math.atan2(-dx, dz)))
+            pitch.append(-math.degrees(math.atan2(dy, horizontal)))
+        return cls(yaw, pitch)
     
-    # Dot product gives cosine of angle between vectors
-    dot_product = x1*x2 + y1*y2 + z1*z2
-    # Clamp to avoid floating point errors
-    dot_product = max(-1.0, min(1.0, dot_product))
+    def __len__(self):
+        return len(self.yaw)
     
-    # Return angle in degrees
-    return math.degrees(math.acos(dot_product))
+    def angles(self, i):
+        """(yaw, pitch) of target i."""
+        return (float(self.yaw[i]), float(self.pitch[i]))
+    
+    def subset(self, indices):
+        """LookDirections of the targets at indices, in that order."""
+        if np is not None:
+            indices = np.asarray(indices, dtype=int)
+            return LookDirections(self.yaw[indices], self.pitch[indices])
+        return LookDirections([self.yaw[i] for i in indices], [self.pitch[i] for i in indices])
+    
+    def rotation_distances_from(self, yaw, pitch):
+        """Rotation distance (the angle smooth_look_at interpolates) from one orientation to every target."""
+        if np is not None:
+            return np.hypot(normalize_angle(self.yaw - yaw), normalize_angle(self.pitch - pitch))
+        # Pitch stays within [-90, 90], so its difference never wraps
+        return [math.hypot((target_yaw - yaw + 180.0) % 360.0 - 180.0, target_pitch - pitch)
+                for target_yaw, target_pitch in zip(self.yaw, self.pitch)]
+    
+    def rotation_distance_steps(self):
+        """Rotation distance from each target to the next one (n - 1 values)."""
+        if np is not None:
+            return np.hypot(normalize_angle(np.diff(self.yaw)), normalize_angle(np.diff(self.pitch)))
+        return [math.hypot(normalize_angle(self.yaw[i + 1] - self.yaw[i]),
+                           normalize_angle(self.pitch[i + 1] - self.pitch[i]))
+                for i in range(len(self.yaw) - 1)]
+    
+    def rotation_distance_matrix(self):
+        """Rotation distance between every pair of targets (n x n)."""
+        if np is not None:
+            # Pitch differences are within +-180 already
+            return np.hypot(normalize_angle(self.yaw[None, :] - self.yaw[:, None]),
+                            self.pitch[None, :] - self.pitch[:, None])
+        return [self.rotation_distances_from(yaw, pitch) for yaw, pitch in zip(self.yaw, self.pitch)]
 
-def sort_blocks_by_viewing_order(blocks, player_pos):
+def look_directions(blocks, player_pos):
     """
-    Sort blocks by natural viewing order (cluster-aware).
-    Looks at nearest block first, then blocks close to current view direction.
+    LookDirections of a list of block dicts (see block_aim_point), computed in
+    one pass. The angles are also stored on the blocks for get_block_look_angles.
     """
-    if not blocks:
-        return []
+    directions = LookDirections.from_points(player_pos, [block_aim_point(block) for block in blocks])
+    for i, block in enumerate(blocks):
+        block['look_angles'] = directions.angles(i)
+    return directions
+
+def estimate_rotation_time(angular_distance, duration):
+    """
+    Time in seconds smooth_look_at takes to rotate by angular_distance degrees.
+    Also takes a NumPy array of distances.
+    """
+    # Scale duration based on angular distance (closer = faster), see the rotation_* options
+    min_duration = min(CONFIG['rotation_min_duration'], duration)
+    full_angle = CONFIG['rotation_full_angle']
+    if np is not None and isinstance(angular_distance, np.ndarray):
+        return min_duration + (duration - min_duration) * np.minimum(angular_distance / full_angle, 1.0)
+    return min_duration + (duration - min_duration) * min(angular_distance / full_angle, 1.0)
+
+def estimate_rotation_times(angular_distances, duration):
+    """estimate_rotation_time over an array or (nested) list, returned as a (nested) list."""
+    if np is not None and isinstance(angular_distances, np.ndarray):
+        return estimate_rotation_time(angular_distances, duration).tolist()
+    if angular_distances and isinstance(angular_distances[0], list):
+        return [estimate_rotation_times(row, duration) for row in angular_distances]
+    # Same as estimate_rotation_time, inlined for speed
+    min_duration = min(CONFIG['rotation_min_duration'], duration)
+    full_angle = CONFIG['rotation_full_angle']
+    scale = (duration - min_duration) / full_angle
+    return [min_duration + (distance if distance < full_angle else full_angle) * scale
+            for distance in angular_distances]
+
+def rotation_step_count(angular_distance, duration, max_steps):
+    """
+    Number of steps smooth_look_at uses for a rotation: about one per
+    rotation_degrees_per_step, at most one per frame and at most max_steps.
+    """
+    steps = math.ceil(angular_distance / CONFIG['rotation_degrees_per_step'])
+    frames = math.ceil(duration * CONFIG['max_orientation_rate'])
+    return max(1, min(steps, frames, max_steps))
+
+# Easing curves for rotations: progress in time (0-1) -> progress in angle (0-1)
+ROTATION_CURVES = {
+    'linear': lambda t: t,
+    'smoothstep': lambda t: t * t * (3 - 2 * t),
+    'minimum_jerk': lambda t: t * t * t * (10 - 15 * t + 6 * t * t),
+    'sine': lambda t: 0.5 - 0.5 * math.cos(math.pi * t),
+}
+
+# Eased progress of every step, cached per (curve, steps) (see get_easing_table)
+_EASING_TABLES = {}
+
+def get_easing_table(curve, steps):
+    """Eased progress at step i / steps for i = 0..steps, computed once per curve and step count."""
+    table = _EASING_TABLES.get((curve, steps))
+    if table is None:
+        ease = ROTATION_CURVES[curve]
+        table = [ease(i / steps) for i in range(steps + 1)]
+        _EASING_TABLES[(curve, steps)] = table
+    return table
+
+def get_block_look_angles(block, player_pos):
+    """
+    Get (yaw, pitch) to look at a block dict (see block_aim_point).
+    The result is stored on the block so plan patching can reuse it
+    (look_directions fills it for a whole scan at once).
+    """
+    angles = block.get('look_angles')
+    if angles is None:
+        angles = calculate_look_angles(player_pos, block_aim_point(block))
+        block['look_angles'] = angles
+    return angles
+
+def _improve_tour(order, costs, start_costs, deadline):
+    """
+    Improve an open tour in place with 2-opt and Or-opt moves until no move
+    helps or the deadline (time.perf_counter value) passes.
+    """
+    n = len(order)
     
-    # Start with the nearest block
-    sorted_blocks = []
-    remaining = blocks.copy()
+    def edge(a, b):
+        # a is None for the starting orientation, b is None past the end of the tour
+        if b is None:
+            return 0.0
+        if a is None:
+            return start_costs[b]
+        return costs[a][b]
     
-    # Sort remaining by distance initially
-    remaining.sort(key=lambda b: b['distance'])
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        
+        # 2-opt: reverse order[i..j]
+        for i in range(n - 1):
+            prev_node = order[i - 1] if i > 0 else None
+            for j in range(i + 1, n):
+                next_node = order[j + 1] if j + 1 < n else None
+                delta = (edge(prev_node, order[j]) + edge(order[i], next_node)
+                         - edge(prev_node, order[i]) - edge(order[j], next_node))
+                if delta < -1e-9:
+                    order[i:j + 1] = reversed(order[i:j + 1])
+                    improved = True
+            if time.perf_counter() >= deadline:
+                return
+        
+        # Or-opt: move a segment of 1-3 blocks to a different place in the tour
+        for length in (1, 2, 3):
+            i = 0
+            while i + length <= n:
+                segment = order[i:i + length]
+                prev_node = order[i - 1] if i > 0 else None
+                next_node = order[i + length] if i + length < n else None
+                removal_gain = (edge(prev_node, segment[0]) + edge(segment[-1], next_node)
+                                - edge(prev_node, next_node))
+                
+                rest = order[:i] + order[i + length:]
+                best_delta = -1e-9
+                best_move = None
+                for k in range(len(rest) + 1):
+                    if k == i:
+                        continue  # Same place it came from
+                    before = rest[k - 1] if k > 0 else None
+                    after = rest[k] if k < len(rest) else None
+                    for candidate in (segment, segment[::-1]):
+                        delta = (edge(before, candidate[0]) + edge(candidate[-1], after)
+                                 - edge(before, after) - removal_gain)
+                        if delta < best_delta:
+                            best_delta = delta
+                            best_move = (k, candidate)
+                
+                if best_move is not None:
+                    k, candidate = best_move
+                    order[:] = rest[:k] + candidate + rest[k:]
+                    improved = True
+                i += 1
+                if time.perf_counter() >= deadline:
+                    return
+
+def plan_rotation_tour(blocks, player_pos, start_orientation, duration, time_budget=0.05, directions=None):
+    """
+    Plan the order to visit blocks in so that total rotation time is minimal.
     
-    # Pick the nearest as first block
-    current_block = remaining.pop(0)
-    sorted_blocks.append(current_block)
+    The visit order is treated as an open tour over look directions, starting
+    from the current orientation. A greedy nearest-rotation tour is built first
+    and then improved with 2-opt / Or-opt local search within time_budget.
+    Rotation time is modelled the same way smooth_look_at scales its duration.
     
-    current_yaw, current_pitch = minescript.player_orientation()
+    Args:
+        blocks: List of block dicts (as returned by find_all_blocks)
+        player_pos: (x, y, z) player position the blocks are viewed from
+        start_orientation: (yaw, pitch) the camera currently has
+        duration: Configured rotation duration
+        time_budget: Seconds the local search may spend improving the tour
+        directions: LookDirections of the blocks, if already computed (see look_directions)
     
-    # For each subsequent block, pick the one closest to current view angle
+    Returns:
+        New list with the blocks in visit order
+    """
+    if len(blocks) < 2:
+        return list(blocks)
+    
+    deadline = time.perf_counter() + time_budget
+    
+    # Rotation times between all blocks, computed in one batch from their look directions
+    if directions is None:
+        directions = LookDirections(*zip(*(get_block_look_angles(block, player_pos) for block in blocks)))
+    start_costs = estimate_rotation_times(directions.rotation_distances_from(*start_orientation), duration)
+    costs = estimate_rotation_times(directions.rotation_distance_matrix(), duration)
+    
+    # Greedy seed: always rotate to the cheapest remaining block
+    remaining = set(range(len(blocks)))
+    current = min(remaining, key=lambda i: (start_costs[i], blocks[i]['distance']))
+    remaining.remove(current)
+    order = [current]
     while remaining:
-        current_pos = current_block['position']
-        current_yaw, current_pitch = calculate_look_angles(player_pos, 
-                                                           (current_pos[0] + 0.5, 
-                                                            current_pos[1] + 0.5, 
-                                                            current_pos[2] + 0.5))
-        
-        # Find block with minimum angular distance from current view
-        best_block = None
-        best_angular_distance = float('inf')
-        
-        for block in remaining:
-            block_pos = block['position']
-            target_yaw, target_pitch = calculate_look_angles(player_pos,
-                                                             (block_pos[0] + 0.5,
-                                                              block_pos[1] + 0.5,
-                                                              block_pos[2] + 0.5))
-            
-            angular_dist = calculate_angular_distance(current_yaw, current_pitch,
-                                                      target_yaw, target_pitch)
-            
-            if angular_dist < best_angular_distance:
-                best_angular_distance = angular_dist
-                best_block = block
-        
-        remaining.remove(best_block)
-        sorted_blocks.append(best_block)
-        current_block = best_block
+        if time.perf_counter() >= deadline:
+            # Out of time: take the rest nearest first, no local search
+            order.extend(sorted(remaining, key=lambda i: blocks[i]['distance']))
+            break
+        row = costs[current]
+        current = min(remaining, key=lambda i: (row[i], blocks[i]['distance']))
+        remaining.remove(current)
+        order.append(current)
+    
+    _improve_tour(order, costs, start_costs, deadline)
+    
+    return [blocks[i] for i in order]
+
+def insert_into_tour(plan, block, player_pos, start_orientation, duration, start=0, end=None):
+    """
+    Insert a block into a planned visit order where it adds the least rotation time.
+    Only insertion points between plan indices start and end are considered.
+    """
+    target = get_block_look_angles(block, player_pos)
+    if end is None:
+        end = len(plan)
+    
+    # Orientations along the plan, starting with the current one
+    angles = [start_orientation] + [get_block_look_angles(planned, player_pos) for planned in plan]
+    path = LookDirections([yaw for yaw, _ in angles], [pitch for _, pitch in angles])
+    to_target = estimate_rotation_times(path.rotation_distances_from(*target), duration)
+    steps = estimate_rotation_times(path.rotation_distance_steps(), duration)
+    
+    best_index = end
+    best_delta = float('inf')
+    for i in range(start, end + 1):
+        # Rotation from the orientation before insertion point i to the target
+        delta = to_target[i]
+        if i < len(plan):
+            # Replaces the rotation previous -> plan[i]
+            delta += to_target[i + 1] - steps[i]
+        if delta < best_delta:
+            best_delta = delta
+            best_index = i
+    
+    plan.insert(best_index, block)
+
+def patch_visit_plan(plan, blocks, player_pos, start_orientation):
+    """
+    Update a persistent visit plan with the result of a new scan.
+    Blocks that vanished are dropped and new blocks are inserted locally
+    (within their priority tier); the order of everything else is kept.
+    
+    Returns:
+        Number of blocks that were added or removed
+    """
+    current = {b['position']: b for b in blocks}
+    planned = {b['position'] for b in plan}
+    
+    kept = [b for b in plan if b['position'] in current]
+    removed = len(plan) - len(kept)
+    plan[:] = kept
+    
+    added = [b for pos, b in current.items() if pos not in planned]
+    if added:
+        if CONFIG['use_cluster_mode']:
+            for block in sorted(added, key=lambda b: b['distance']):
+                # Plan is ordered by priority (highest first), stay inside this block's tier
+                priority = block.get('priority', 0)
+                start = sum(1 for b in plan if b.get('priority', 0) > priority)
+                end = sum(1 for b in plan if b.get('priority', 0) >= priority)
+                insert_into_tour(plan, block, player_pos, start_orientation,
+                                 CONFIG['rotation_duration'], start, end)
+        else:
+            plan.extend(added)
+            plan.sort(key=lambda b: (-b.get('priority', 0), b['distance']))
+    
+    return removed + len(added)
+
+def sort_blocks_by_viewing_order(blocks, player_pos, directions=None):
+    """
+    Sort blocks by natural viewing order (cluster-aware).
+    Plans a rotation-minimizing tour starting from the current view direction.
+    Higher priority blocks are all visited before lower priority ones.
+    directions are the blocks' LookDirections, if already computed.
+    """
+    if not blocks:
+        return []
+    if directions is None:
+        directions = look_directions(blocks, player_pos)
+    
+    tiers = {}
+    for i, block in enumerate(blocks):
+        tiers.setdefault(block.get('priority', 0), []).append(i)
+    
+    orientation = minescript.player_orientation()
+    sorted_blocks = []
+    for priority in sorted(tiers, reverse=True):
+        indices = tiers[priority]
+        tour = plan_rotation_tour([blocks[i] for i in indices], player_pos, orientation,
+                                  CONFIG['rotation_duration'],
+                                  CONFIG['planner_time_budget'] / len(tiers),
+                                  directions if len(tiers) == 1 else directions.subset(indices))
+        sorted_blocks.extend(tour)
+        # Next tier starts where this one ends
+        orientation = get_block_look_angles(tour[-1], player_pos)
     
     return sorted_blocks
 
+class MiningCancelled(Exception):
+    """Raised inside a mining step when the controller stops it."""
+
+# Set by the controller to stop the step running in the worker thread
+_cancel_mining = threading.Event()
+
+def check_cancelled():
+    """Raise MiningCancelled if the running step should stop (checked between calls)."""
+    if _cancel_mining.is_set():
+        raise MiningCancelled()
+
+# Measured time one player_set_orientation call takes (moving average)
+_orientation_call_latency = 0.0
+
+def set_orientation_timed(yaw, pitch):
+    """Set the camera orientation and update the measured call latency."""
+    global _orientation_call_latency
+    call_start = time.perf_counter()
+    minescript.player_set_orientation(yaw, pitch)
+    elapsed = time.perf_counter() - call_start
+    _orientation_call_latency += (elapsed - _orientation_call_latency) * 0.2
+
+def _sleep_until(deadline):
+    """Sleep until the given time.perf_counter() value (no-op if it passed)."""
+    remaining = deadline - time.perf_counter()
+    if remaining > 0:
+        time.sleep(remaining)
+
 def smooth_look_at(target_pos, duration=1.0, steps=60):
     """
     Smoothly rotate camera to look at target position.
     
+    Duration and step count follow the rotation profile (see the rotation_*
+    options): small corrections are quick and take a few steps, large swings
+    take duration and up to steps steps, eased with the configured curve.
+    
+    Every step has an absolute deadline measured from the start of the rotation,
+    and calls are issued early by the measured call latency, so the rotation
+    takes its planned duration. Steps that are already late or would land
+    in the same frame as the previous update are skipped.
+    
     Args:
         target_pos: (x, y, z) tuple of target block position
-        duration: Time in seconds for the smooth rotation
-        steps: Number of interpolation steps
+        duration: Time in seconds for a full-size rotation
+        steps: Maximum number of interpolation steps
     
     Returns:
         Final (yaw, pitch) orientation after rotation
@@ -252,198 +1404,917 @@ def smooth_look_at(target_pos, duration=1.0, steps=60):
     # Calculate total angular distance
     angular_distance = math.sqrt(yaw_diff**2 + pitch_diff**2)
     
-    # Scale duration based on angular distance (closer = faster)
-    if angular_distance < 15:
-        duration_scale = 0.3 + (angular_distance / 15) * 0.7  # 30% to 100% of duration
-        actual_duration = duration * duration_scale
-    else:
-        actual_duration = duration
+    if angular_distance < 1e-6:
+        return (target_yaw, target_pitch)  # Already looking there
     
-    # Perform smooth interpolation
-    step_delay = actual_duration / steps
+    # Scale duration and step count based on angular distance (closer = faster, fewer calls)
+    actual_duration = estimate_rotation_time(angular_distance, duration)
+    if actual_duration <= 0:
+        # No time to spread steps over (rotation_duration 0), jump to the target
+        set_orientation_timed(target_yaw, target_pitch)
+        return (target_yaw, target_pitch)
+    steps = rotation_step_count(angular_distance, actual_duration, steps)
+    easing = get_easing_table(CONFIG['rotation_curve'], steps)
     
-    for i in range(steps + 1):
-        # Base interpolation parameter (0.0 to 1.0)
-        t = i / steps
-        
-        # Apply smoothstep for ease-in-out
-        smooth_t = t * t * (3 - 2 * t)
-        
-        # Direct linear interpolation
-        new_yaw = current_yaw + yaw_diff * smooth_t
-        new_pitch = current_pitch + pitch_diff * smooth_t
-        
-        # Set orientation
-        minescript.player_set_orientation(new_yaw, new_pitch)
-        
-        # Wait between steps
-        if i < steps:
-            time.sleep(step_delay)
+    def orientation_at(i):
+        # Eased progress of step i, then interpolate linearly
+        smooth_t = easing[i]
+        return (current_yaw + yaw_diff * smooth_t, current_pitch + pitch_diff * smooth_t)
+    
+    start = time.perf_counter()
+    end = start + actual_duration
     
-    # Break block if enabled
-    if CONFIG['break_blocks']:
-        if CONFIG['break_delay'] > 0:
-            time.sleep(CONFIG['break_delay'])
+    if (CONFIG['sync_rotation_to_render']
+            and hasattr(minescript.EventQueue, 'register_render_listener')):
+        # At most one update per rendered frame, at the step reached by then
+        last_step = 0
+        with minescript.EventQueue() as frames:
+            frames.register_render_listener()
+            while True:
+                try:
+                    frames.get(timeout=actual_duration)
+                    while True:
+                        frames.get(block=False)  # Skip frames we fell behind on
+                except queue.Empty:
+                    pass
+                
+                check_cancelled()
+                t = (time.perf_counter() + _orientation_call_latency - start) / actual_duration
+                if t >= 1:
+                    break
+                step = int(t * steps)
+                if step > last_step:
+                    set_orientation_timed(*orientation_at(step))
+                    last_step = step
+    else:
+        step_delay = actual_duration / steps
+        min_interval = 1.0 / CONFIG['max_orientation_rate']
+        last_update = start
+        i = 0
         
-        # Press and hold attack
-        minescript.player_press_attack(True)
-        time.sleep(CONFIG['break_hold_time'])
-        minescript.player_press_attack(False)
+        while True:
+            # Next step that isn't late yet and lands in a new frame
+            earliest = max(time.perf_counter() + _orientation_call_latency, last_update + min_interval)
+            i = max(i + 1, math.ceil((earliest - start) / step_delay))
+            if i >= steps:
+                break
+            
+            deadline = start + i * step_delay
+            _sleep_until(deadline - _orientation_call_latency)
+            check_cancelled()
+            set_orientation_timed(*orientation_at(i))
+            last_update = deadline
+    
+    # Final step lands exactly on the target at the end of the rotation
+    _sleep_until(end - _orientation_call_latency)
+    set_orientation_timed(target_yaw, target_pitch)
     
     return (target_yaw, target_pitch)
 
-def break_block_at_position(x, y, z):
+# Learned time in seconds it takes to break each block type (moving average)
+_break_time_estimates = {}
+
+def break_block_at_position(x, y, z, block_type=None, while_breaking=None):
     """
     Break a block at the specified position by simulating player attack.
+    The camera must already be looking at the block (see smooth_look_at).
+    
+    Attack is held only until the block is gone: the block is polled with
+    getblock, starting shortly before the learned break time for its type.
     
     Args:
         x, y, z: Block coordinates to break
+        block_type: Full block type if known, otherwise taken from the targeted block
+        while_breaking: Optional function called once attack is held, to do
+                        other work while the block breaks. Attack stays held until
+                        it returns, so it should be quick (see take_next_planned)
     
     Returns:
-        True if block was successfully targeted and attack initiated
+        The block type now at the position if the block was broken, else None
     """
     try:
-        # First, ensure the camera is looking at the block center
-        player_pos = minescript.player_position()
-        target_yaw, target_pitch = calculate_look_angles(
-            player_pos, 
-            (x + 0.5, y + 0.5, z + 0.5)
-        )
-        minescript.player_set_orientation(target_yaw, target_pitch)
-        
-        # Small delay to ensure orientation is set
-        time.sleep(0.05)
-        
         # Verify we're looking at the correct block
         targeted = minescript.player_get_targeted_block(max_distance=6)
-        if targeted and targeted.position == (x, y, z):
-            # Press and hold attack button
-            minescript.player_press_attack(True)
-            time.sleep(CONFIG['break_hold_time'])  # Hold to initiate breaking
-            minescript.player_press_attack(False)
-            
-            minescript.echo(f"  ⛏ Breaking block at ({x}, {y}, {z})")
-            return True
-        else:
+        if not targeted or tuple(targeted.position) != (x, y, z):
             if targeted:
-                minescript.echo(f"  ✗ Targeted wrong block: {targeted.position} instead of ({x}, {y}, {z})")
+                LOG.warning(f"  ✗ Targeted wrong block: {targeted.position} instead of ({x}, {y}, {z})")
             else:
-                minescript.echo(f"  ✗ No block in crosshairs at ({x}, {y}, {z})")
-            return False
+                LOG.warning(f"  ✗ No block in crosshairs at ({x}, {y}, {z})")
+            return None
+        
+        base_type = parse_block_state(block_type or targeted.type)[0]
+        estimate = _break_time_estimates.get(base_type, CONFIG['break_hold_time'])
+        
+        # Press and hold attack button until the block is gone
+        minescript.player_press_attack(True)
+        start = time.perf_counter()
+        broken = False
+        try:
+            if while_breaking is not None:
+                while_breaking()
             
+            # No point checking before the block is expected to break
+            _sleep_until(start + estimate * 0.9)
+            deadline = start + CONFIG['break_timeout']
+            while True:
+                current_type = minescript.getblock(x, y, z)
+                if parse_block_state(current_type)[0] != base_type:
+                    broken = True
+                    break
+                if time.perf_counter() >= deadline:
+                    break
+                time.sleep(CONFIG['break_poll_interval'])
+                check_cancelled()
+        finally:
+            minescript.player_press_attack(False)
+        
+        elapsed = time.perf_counter() - start
+        if not broken:
+            LOG.warning(f"  ✗ Block at ({x}, {y}, {z}) still there after {elapsed:.1f}s")
+            return None
+        
+        # Learn how long this block type takes to break
+        if base_type in _break_time_estimates:
+            _break_time_estimates[base_type] += (elapsed - _break_time_estimates[base_type]) * 0.3
+        else:
+            _break_time_estimates[base_type] = elapsed
+        return current_type
+    
+    except MiningCancelled:
+        raise  # Not a failure, the controller is stopping
     except Exception as e:
-        minescript.echo(f"  ✗ Failed to break block: {e}")
-        return False
+        LOG.error(f"  ✗ Failed to break block: {e}")
+        return None
 
-def main():
-    """Main function to find and look at all target blocks sequentially."""
-    minescript.echo("=== Smooth Block Camera ===")
-    minescript.echo(f"Target: {CONFIG['target_block']}")
-    minescript.echo(f"Config: distance={CONFIG['search_distance']}m, " +
-                   f"speed={CONFIG['rotation_duration']}s, " +
-                   f"cooldown={CONFIG['block_cooldown']}s, " +
-                   f"cluster_mode={CONFIG['use_cluster_mode']}, " +
-                   f"break_blocks={CONFIG['break_blocks']}, " +
-                   f"ignore_state={CONFIG['ignore_block_state']}")
+def pack_position(x, y, z):
+    """Pack block coordinates into one signed 64-bit int (Minecraft's BlockPos.asLong layout)."""
+    packed = ((x & 0x3FFFFFF) << 38) | ((z & 0x3FFFFFF) << 12) | (y & 0xFFF)
+    return packed - (1 << 64) if packed >= 1 << 63 else packed
+
+def unpack_position(packed):
+    """Inverse of pack_position."""
+    x = packed >> 38  # Arithmetic shift keeps the sign
+    z = (packed >> 12) & 0x3FFFFFF
+    y = packed & 0xFFF
+    # Sign-extend the other fields
+    if z >= 1 << 25:
+        z -= 1 << 26
+    if y >= 1 << 11:
+        y -= 1 << 12
+    return (x, y, z)
+
+class RegionIndex:
+    """
+    Compact index of target block positions over a wide region, built by
+    streaming one getblocklist scan per chunk. Positions are stored packed
+    into ints (see pack_position).
+    """
     
-    # Get key name for display
-    key_names = {89: 'Y', 82: 'R', 71: 'G', 84: 'T'}
-    rescan_key_name = key_names.get(CONFIG['rescan_key'], f"key {CONFIG['rescan_key']}")
-    minescript.echo(f"\nPress '{rescan_key_name}' to start scanning | Open any GUI to exit")
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.targets = set()  # Packed positions of matching blocks
+        self.scanned_chunks = set()  # (chunk_x, chunk_z) already indexed
     
-    total_blocks_processed = 0
-    processed_positions = set()  # Track blocks we've already looked at
-    is_active = False  # Whether we're actively processing blocks
+    def __len__(self):
+        return len(self.targets)
     
-    # Setup event queue for key and screen events
-    event_queue = minescript.EventQueue()
-    event_queue.register_key_listener()
+    def scan_chunk(self, chunk_x, chunk_z, y_min, y_max):
+        """Index the target blocks of one chunk between y_min and y_max."""
+        positions = [[x, y, z]
+                     for x in range(chunk_x * 16, chunk_x * 16 + 16)
+                     for z in range(chunk_z * 16, chunk_z * 16 + 16)
+                     for y in range(y_min, y_max + 1)]
+        block_types = minescript.getblocklist(positions)
+        match = self.matcher.match
+        for position, block_type in zip(positions, block_types):
+            # Unloaded positions come back empty
+            if block_type and match(block_type) is not None:
+                self.targets.add(pack_position(*position))
+        self.scanned_chunks.add((chunk_x, chunk_z))
+    
+    def scan_region(self, center, radius, height):
+        """Index every chunk within radius blocks (horizontally) of center."""
+        cx, cy, cz = (math.floor(c) for c in center)
+        y_min, y_max = cy + height[0], cy + height[1]
+        for chunk_x in range((cx - radius) >> 4, ((cx + radius) >> 4) + 1):
+            for chunk_z in range((cz - radius) >> 4, ((cz + radius) >> 4) + 1):
+                if (chunk_x, chunk_z) not in self.scanned_chunks:
+                    self.scan_chunk(chunk_x, chunk_z, y_min, y_max)
+    
+    def discard_near(self, center, max_distance):
+        """
+        Forget targets within max_distance, measured like find_all_blocks
+        measures reach (they were mined or can't be reached from there).
+        """
+        limit = max_distance ** 2
+        for packed in list(self.targets):
+            x, y, z = unpack_position(packed)
+            if (x - center[0])**2 + (y - center[1])**2 + (z - center[2])**2 <= limit:
+                self.targets.discard(packed)
+    
+    def clusters(self, cluster_radius):
+        """
+        Group indexed targets into clusters of blocks within cluster_radius
+        of each other.
+        
+        Returns:
+            List of clusters, each a list of (x, y, z) positions
+        """
+        positions = [unpack_position(packed) for packed in self.targets]
+        cell_size = max(1, int(cluster_radius))
+        grid = {}
+        for position in positions:
+            cell = (position[0] // cell_size, position[1] // cell_size, position[2] // cell_size)
+            grid.setdefault(cell, []).append(position)
+        
+        # Flood fill over neighbouring grid cells
+        limit = cluster_radius ** 2
+        seen = set()
+        clusters = []
+        for start in positions:
+            if start in seen:
+                continue
+            seen.add(start)
+            cluster = [start]
+            stack = [start]
+            while stack:
+                x, y, z = stack.pop()
+                cx, cy, cz = x // cell_size, y // cell_size, z // cell_size
+                for dx in (-1, 0, 1):
+                    for dy in (-1, 0, 1):
+                        for dz in (-1, 0, 1):
+                            for other in grid.get((cx + dx, cy + dy, cz + dz), ()):
+                                if other not in seen and (other[0] - x)**2 + (other[1] - y)**2 + (other[2] - z)**2 <= limit:
+                                    seen.add(other)
+                                    cluster.append(other)
+                                    stack.append(other)
+            clusters.append(cluster)
+        return clusters
+    
+    def best_cluster(self, player_pos, cluster_radius, walk_speed):
+        """
+        Pick the cluster with the most blocks per second of walking.
+        
+        Returns:
+            (cluster positions, (x, y, z) centre) or None if the index is empty
+        """
+        best = None
+        best_score = 0.0
+        for cluster in self.clusters(cluster_radius):
+            center = (sum(p[0] for p in cluster) / len(cluster) + 0.5,
+                      sum(p[1] for p in cluster) / len(cluster),
+                      sum(p[2] for p in cluster) / len(cluster) + 0.5)
+            distance = math.sqrt((center[0] - player_pos[0])**2 + (center[2] - player_pos[2])**2)
+            score = len(cluster) / (distance / walk_speed + 1.0)
+            if score > best_score:
+                best_score = score
+                best = (cluster, center)
+        return best
+
+def walk_to(target, stop_distance, max_time):
+    """
+    Walk towards a target position (straight line, jumping when blocked).
     
+    Args:
+        target: (x, y, z) position to walk to
+        stop_distance: Stop once this close horizontally
+        max_time: Give up after this many seconds
+    
+    Returns:
+        True if the target was reached
+    """
+    # Face the target first, then keep the heading corrected while walking
+    smooth_look_at((target[0], minescript.player_position()[1] + EYE_HEIGHT, target[2]),
+                   duration=CONFIG['rotation_duration'], steps=CONFIG['rotation_steps'])
+    
+    start = time.perf_counter()
+    last_progress = start
+    best_distance = float('inf')
+    jumping = False
+    minescript.player_press_forward(True)
     try:
-        while True:
-            # Check for exit condition (GUI opened)
-            current_screen = minescript.screen_name()
-            if current_screen is not None:
-                minescript.echo(f"GUI opened ({current_screen}) - Exiting script...")
-                break
+        while time.perf_counter() - start < max_time:
+            px, py, pz = minescript.player_position()
+            distance = math.sqrt((target[0] - px)**2 + (target[2] - pz)**2)
+            if distance <= stop_distance:
+                return True
             
-            # Check for scan key press to start/restart
-            try:
-                while True:
-                    event = event_queue.get(block=False)
-                    if event.type == "key":
-                        # Key down event (action == 1) and matches rescan key
-                        if event.action == 1 and event.key == CONFIG['rescan_key']:
-                            minescript.echo(f"\n'{rescan_key_name}' pressed - Starting new scan session!")
-                            processed_positions.clear()  # Clear processed list
-                            is_active = True
-            except:
-                pass  # No events in queue
+            if distance < best_distance - 0.2:
+                best_distance = distance
+                last_progress = time.perf_counter()
+                if jumping:
+                    minescript.player_press_jump(False)
+                    jumping = False
+            elif time.perf_counter() - last_progress > 0.5:
+                # Not getting closer, try to jump over whatever is in the way
+                if not jumping:
+                    minescript.player_press_jump(True)
+                    jumping = True
+                if time.perf_counter() - last_progress > 3.0:
+                    return False
             
-            # Only process if active
-            if not is_active:
-                time.sleep(0.1)
-                continue
+            yaw, pitch = calculate_look_angles((px, py, pz), (target[0], py + EYE_HEIGHT, target[2]))
+            minescript.player_set_orientation(yaw, 0.0)
+            time.sleep(0.1)
+            check_cancelled()
+        return False
+    finally:
+        minescript.player_press_forward(False)
+        minescript.player_press_jump(False)
+
+def handle_world_event(event, scan_cache, processed_positions, confirmed_blocks=None):
+    """
+    Apply a block update or chunk event to the scan cache. confirmed_blocks
+    (position -> type after our own break) tells the script's own changes
+    apart from changes made by something else.
+    
+    Returns:
+        True if the event was a world change event
+    """
+    if event.type == "block_update":
+        position = tuple(event.position)
+        scan_cache.update(position, event.new_state)
+        if confirmed_blocks is not None and confirmed_blocks.get(position) == event.new_state:
+            return True  # The update for our own break, still handled
+        # Something else changed this block since we handled it (e.g. regrowth)
+        processed_positions.discard(position)
+        return True
+    
+    if event.type == "chunk":
+        # Chunk (un)loaded, anything we knew about it may be outdated
+        scan_cache.invalidate_area(event.x_min, event.z_min, event.x_max, event.z_max)
+        return True
+    
+    return False
+
+class MiningSession:
+    """
+    State of a mining session: the scan cache, the blocks already handled
+    and the persistent visit plan.
+    """
+    
+    def __init__(self, matcher):
+        self.matcher = matcher
+        self.scan_cache = ScanCache()  # Block types by position, reused between scans
+        self.processed_positions = set()  # Track blocks we've already looked at
+        self.confirmed_blocks = {}  # Position -> type after a confirmed break (None: looked at only), saved to disk
+        self.visit_plan = []  # Remaining blocks in the order they will be visited
+        self.plan_origin = None  # Player block position the visit plan was made from
+        self.camera_orientation = None  # Orientation after the last rotation
+        self.remaining = 0  # Unprocessed blocks found by the last scan
+        self.planned_ahead = None  # Next block, if it was chosen during the last break
+        self.region_index = None  # Targets in the wider region (walk_to_clusters)
+        self.walked_cluster = None  # Cluster walked to last, until a block is processed there
+        self.disk_cache = None  # DiskScanCache, if enabled
+        self.resumed = False  # True once the disk cache was loaded
+        self.last_save = time.perf_counter()
+    
+    def reset(self):
+        """Start over (new scan session)."""
+        self.processed_positions.clear()  # Clear processed list
+        self.confirmed_blocks.clear()
+        self.scan_cache.clear()  # World may have changed since last session
+        self.visit_plan = []
+        self.planned_ahead = None
+        self.camera_orientation = None  # The player may have looked around since
+        self.region_index = None
+        self.walked_cluster = None
+        
+        if self.disk_cache is None:
+            return
+        if self.resumed:
+            # The rescan key starts from scratch, everything is scanned again
+            self.disk_cache.start_fresh()
+            return
+        
+        # The first session resumes from the disk cache: recent scans and confirmed blocks
+        self.resumed = True
+        loaded_blocks, loaded_confirmed = self.disk_cache.load_into(self.scan_cache, self.confirmed_blocks)
+        self.processed_positions.update(self.confirmed_blocks)
+        if loaded_blocks or loaded_confirmed:
+            LOG.info(f"Resumed from disk cache: {loaded_blocks} block(s), "
+                     f"{loaded_confirmed} processed position(s)")
+    
+    def save(self, force=False):
+        """Write the disk cache if enabled and the save interval has passed (or force)."""
+        if self.disk_cache is None:
+            return
+        if force or time.perf_counter() - self.last_save >= CONFIG['disk_cache_save_interval']:
+            self.last_save = time.perf_counter()
+            with METRICS.phase('disk_cache'):
+                # A world change since the break un-processes a position
+                self.disk_cache.save(self.scan_cache, self.confirmed_blocks.keys() & self.processed_positions)
+    
+    def walk_to_next_cluster(self):
+        """
+        Called when nothing is left within reach: index the region around the
+        player (first time only) and walk to the best remaining cluster.
+        
+        Returns:
+            True if the player walked to a cluster (scan again), False if none is left
+        """
+        player_pos = minescript.player_position()
+        
+        if self.region_index is None:
+            LOG.info(f"Indexing targets within {CONFIG['region_radius']} blocks...")
+            self.region_index = RegionIndex(self.matcher)
+            # walk_to only moves horizontally, so targets further above or
+            # below than the reach can't be mined from anywhere
+            reach = math.floor(CONFIG['search_distance'])
+            height = (max(CONFIG['region_height'][0], -reach), min(CONFIG['region_height'][1], reach))
+            if height != tuple(CONFIG['region_height']):
+                LOG.info(f"Region height capped to {height} (search_distance {CONFIG['search_distance']})")
+            with METRICS.phase('region_scan'):
+                self.region_index.scan_region(player_pos, CONFIG['region_radius'], height)
+            LOG.info(f"Found {len(self.region_index)} target block(s) in the region")
+        
+        # Whatever is left within reach here was mined or can't be reached
+        self.region_index.discard_near(player_pos, CONFIG['search_distance'])
+        if self.walked_cluster is not None:
+            # The walk "reached" it but nothing there could be mined, don't walk there again
+            for position in self.walked_cluster:
+                self.region_index.targets.discard(pack_position(*position))
+            self.walked_cluster = None
+        
+        while True:
+            best = self.region_index.best_cluster(player_pos, CONFIG['cluster_radius'], CONFIG['walk_speed'])
+            if best is None:
+                return False
+            
+            cluster, center = best
+            LOG.info(f"Walking to a cluster of {len(cluster)} block(s) at "
+                     f"({center[0]:.0f}, {center[1]:.0f}, {center[2]:.0f})")
+            with METRICS.phase('walk'):
+                reached = walk_to(center, max(1.0, CONFIG['search_distance'] - 2), CONFIG['max_walk_time'])
+            self.camera_orientation = None  # walk_to turned the camera
+            if reached:
+                self.walked_cluster = cluster
+                return True
             
+            # Couldn't get there, don't try this cluster again
+            LOG.warning("✗ Couldn't reach the cluster, trying the next one")
+            for position in cluster:
+                self.region_index.targets.discard(pack_position(*position))
+            player_pos = minescript.player_position()
+    
+    def next_block(self):
+        """
+        Scan for target blocks (through the cache) and take the next block
+        from the visit plan.
+        
+        Returns:
+            Block dict to visit next, or None if no unprocessed blocks are left
+        """
+        if self.planned_ahead is not None:
+            block_info, self.planned_ahead = self.planned_ahead, None
+            return block_info
+        
+        with METRICS.phase('scan'):
             player_pos = minescript.player_position()
             
             # Scan for all target blocks
             blocks = find_all_blocks(
                 max_distance=CONFIG['search_distance'],
-                block_type=CONFIG['target_block'],
-                ignore_state=CONFIG['ignore_block_state']
+                block_type=self.matcher,
+                cache=self.scan_cache
             )
             
             # Filter out already processed blocks
-            unprocessed_blocks = [b for b in blocks if b['position'] not in processed_positions]
-            
-            if not unprocessed_blocks:
-                minescript.echo(f"✓ No more unprocessed blocks found!")
-                minescript.echo(f"Total blocks processed in this session: {total_blocks_processed}")
-                minescript.echo(f"Press '{rescan_key_name}' to start new scan session or open GUI to exit")
-                is_active = False
-                total_blocks_processed = 0
-                time.sleep(0.1)
-                continue
-            
-            # Sort blocks based on configuration
-            if CONFIG['use_cluster_mode']:
-                sorted_blocks = sort_blocks_by_viewing_order(unprocessed_blocks, player_pos)
+            unprocessed_blocks = [b for b in blocks if b['position'] not in self.processed_positions]
+        
+        # Drop blocks hidden behind others, aim at a visible face where needed
+        if CONFIG['occlusion_check']:
+            with METRICS.phase('occlusion'):
+                eye_pos = (player_pos[0], player_pos[1] + EYE_HEIGHT, player_pos[2])
+                visible_blocks = []
+                for block in unprocessed_blocks:
+                    aim_point = find_visible_point(block['position'], eye_pos, self.scan_cache.blocks)
+                    if aim_point is not None:
+                        block['aim_point'] = aim_point
+                        visible_blocks.append(block)
+                unprocessed_blocks = visible_blocks
+        
+        self.remaining = len(unprocessed_blocks)
+        if not unprocessed_blocks:
+            self.visit_plan = []
+            return None
+        
+        # Look direction of every candidate in one pass, shared by planning and patching
+        with METRICS.phase('plan'):
+            directions = look_directions(unprocessed_blocks, player_pos)
+        
+        # Plan once per position, afterwards only patch the plan with scan changes
+        with METRICS.phase('plan'):
+            player_block = (math.floor(player_pos[0]), math.floor(player_pos[1]), math.floor(player_pos[2]))
+            if not self.visit_plan or player_block != self.plan_origin:
+                if CONFIG['use_cluster_mode']:
+                    self.visit_plan = sort_blocks_by_viewing_order(unprocessed_blocks, player_pos, directions)
+                else:
+                    self.visit_plan = sorted(unprocessed_blocks, key=lambda b: (-b['priority'], b['distance']))
+                self.plan_origin = player_block
             else:
-                sorted_blocks = sorted(unprocessed_blocks, key=lambda b: b['distance'])
-            
-            # Process only the first block in the sorted list
-            block_info = sorted_blocks[0]
-            
-            # Check for exit condition before processing
-            current_screen = minescript.screen_name()
-            if current_screen is not None:
-                minescript.echo(f"GUI opened ({current_screen}) - Exiting script...")
-                break
-            
-            x, y, z = block_info['position']
-            distance = block_info['distance']
-            full_type = block_info.get('full_type', CONFIG['target_block'])
-            
-            total_remaining = len(unprocessed_blocks)
-            minescript.echo(f"[{total_remaining} remaining] Looking at {full_type} at ({x}, {y}, {z}) - {distance:.1f}m away")
-            
-            # Smooth look with configured duration and steps
-            smooth_look_at((x + 0.5, y + 0.5, z + 0.5), 
-                         duration=CONFIG['rotation_duration'], 
-                         steps=CONFIG['rotation_steps'])
-            
-            # Mark this block as processed
-            processed_positions.add(block_info['position'])
-            total_blocks_processed += 1
-            
-            # Pause before next scan/block
-            time.sleep(CONFIG['block_cooldown'])
+                if self.camera_orientation is None:
+                    self.camera_orientation = minescript.player_orientation()
+                patch_visit_plan(self.visit_plan, unprocessed_blocks, player_pos, self.camera_orientation)
+        
+        # Process the next block of the plan
+        return self.visit_plan.pop(0)
+    
+    def sweep_targets(self, block_info):
+        """
+        Find planned targets the crosshair crosses while smooth_look_at rotates
+        to block_info, by casting rays along the rotation path through the scan cache.
+        
+        Returns:
+            List of (block dict, point to look at to target it), in the order
+            the crosshair reaches them
+        """
+        planned = {block['position']: block for block in self.visit_plan}
+        planned.pop(block_info['position'], None)
+        if not planned:
+            return []
+        
+        player_pos = minescript.player_position()
+        eye = (player_pos[0], player_pos[1] + EYE_HEIGHT, player_pos[2])
+        start_yaw, start_pitch = self.camera_orientation or minescript.player_orientation()
+        target_yaw, target_pitch = calculate_look_angles(player_pos, block_aim_point(block_info))
+        # smooth_look_at interpolates yaw and pitch linearly (only the timing is eased)
+        yaw_diff = angle_difference(start_yaw, target_yaw)
+        pitch_diff = angle_difference(start_pitch, target_pitch)
+        samples = math.ceil(math.hypot(yaw_diff, pitch_diff) / CONFIG['sweep_sample_angle'])
+        reach = CONFIG['search_distance']
+        
+        def direction_at(t):
+            return look_vector(start_yaw + yaw_diff * t, start_pitch + pitch_diff * t)
+        
+        crossed = {}  # Position -> [first, last] sample that hit it
+        for i in range(1, samples):
+            dx, dy, dz = direction_at(i / samples)
+            end = (eye[0] + dx * reach, eye[1] + dy * reach, eye[2] + dz * reach)
+            hit = raycast_first_block(eye, end, self.scan_cache.blocks)
+            if hit in planned:
+                crossed.setdefault(hit, [i, i])[1] = i
+        
+        sweep = []
+        for position, (first, last) in sorted(crossed.items(), key=lambda item: item[1][0]):
+            # Aim at the middle of the stretch of the path that hits the block
+            dx, dy, dz = direction_at((first + last) / 2 / samples)
+            sweep.append((planned[position], (eye[0] + dx, eye[1] + dy, eye[2] + dz)))
+        return sweep
+    
+    def remove_from_plan(self, position):
+        """Take a block off the visit plan (e.g. broken in passing)."""
+        self.visit_plan = [block for block in self.visit_plan if block['position'] != position]
+    
+    def prefetch(self, block_info):
+        """
+        Update the scan cache for the next scan while the camera rotates to
+        block_info: query positions within reach the cache doesn't know yet and
+        re-query the block and its neighbours, dropping changed ones from the
+        processed positions like a block update would.
+        """
+        player_pos = minescript.player_position()
+        positions, _ = get_reach_positions(player_pos, CONFIG['search_distance'])
+        self.scan_cache.prune(player_pos, CONFIG['search_distance'])
+        fetched = self.scan_cache.fetch(positions)
+        
+        x, y, z = block_info['position']
+        around = [(x, y, z)] + [(x + dx, y + dy, z + dz) for dx, dy, dz in BLOCK_FACES]
+        for position in self.scan_cache.refresh(around):
+            self.processed_positions.discard(position)
+        METRICS.count('prefetched_positions', fetched + len(around))
+    
+    def plan_ahead(self):
+        """Choose the next block now (e.g. during block_cooldown)."""
+        self.planned_ahead = self.next_block()
+    
+    def take_next_planned(self):
+        """
+        Take the next block of the current visit plan without scanning or
+        planning (no minescript calls), so it can run while attack is held.
+        Does nothing if the plan is empty or its next block is no longer a
+        target in the scan cache; next_block scans and plans as usual then.
+        """
+        if not self.visit_plan:
+            return
+        block_info = self.visit_plan[0]
+        block_type = self.scan_cache.blocks.get(block_info['position'])
+        if (block_info['position'] not in self.processed_positions
+                and block_type is not None and self.matcher.match(block_type) is not None):
+            self.planned_ahead = self.visit_plan.pop(0)
+    
+    def mark_processed(self, position, new_type=None):
+        """
+        Remember that a block was handled. If its new type is known (break was
+        confirmed) it is stored, otherwise the position is re-queried on the next scan.
+        Confirmed breaks, and every block of a look-only session, are saved to disk.
+        """
+        self.processed_positions.add(position)
+        self.walked_cluster = None  # The last walk paid off
+        if new_type is not None or not CONFIG['break_blocks']:
+            self.confirmed_blocks[position] = new_type
+        if new_type is not None:
+            self.scan_cache.update(position, new_type)
+        else:
+            self.scan_cache.invalidate(position)
+
+class MiningController:
+    """
+    Asyncio front end of the script. One task forwards minescript events
+    (keys, world changes) to an inbox, another runs the mining loop. Every
+    blocking step (scan and plan, rotation, break) runs in a worker thread,
+    so key presses and GUIs are handled as soon as their event arrives and
+    an idle script costs nothing but an occasional screen check.
+    """
+    
+    def __init__(self, session, event_queue, rescan_key_name):
+        self.session = session
+        self.event_queue = event_queue
+        self.rescan_key_name = rescan_key_name
+        self.inbox = None  # asyncio.Queue of events, None = nothing happened for a while
+        self.mining_task = None  # Task running mine(), while active
+        self.world_events = []  # World changes that arrived during a mining step
+        self.total_blocks_processed = 0
+    
+    @property
+    def is_active(self):
+        return self.mining_task is not None and not self.mining_task.done()
+    
+    async def run(self):
+        """Handle events until a GUI is opened."""
+        self.inbox = asyncio.Queue()
+        pump = asyncio.create_task(self.pump_events())
+        try:
+            while True:
+                event = await self.inbox.get()
+                self.check_mining_task()
+                screen = await self.handle_event(event)
+                if screen is not None:
+                    LOG.info(f"GUI opened ({screen}) - Exiting script...")
+                    break
+        finally:
+            pump.cancel()
+            await self.stop_mining()
+    
+    async def pump_events(self):
+        """Wait for minescript events in a worker thread and pass them to the inbox."""
+        while True:
+            try:
+                event = await asyncio.to_thread(self.event_queue.get, True, CONFIG['screen_poll_interval'])
+            except queue.Empty:
+                event = None
+            self.inbox.put_nowait(event)
+    
+    async def handle_event(self, event):
+        """
+        React to one inbox event.
+        
+        Returns:
+            Name of the opened GUI if the script should exit, else None
+        """
+        if event is None:
+            # Quiet for a while: check for GUIs opened without a key press
+            METRICS.maybe_flush()
+            LOG.maybe_summarize()
+            return await asyncio.to_thread(minescript.screen_name)
+        
+        if event.type == "screen":
+            return event.screen  # Seen by the mining loop
+        
+        if event.type == "key":
+            # Keys are reported with the screen that was open when they were pressed
+            if getattr(event, 'screen', None) is not None:
+                return event.screen
+            # Key down event (action == 1) and matches rescan key
+            if event.action == 1 and event.key == CONFIG['rescan_key']:
+                LOG.info(f"\n'{self.rescan_key_name}' pressed - Starting new scan session!")
+                await self.start_mining()
+            return None
+        
+        if self.is_active:
+            self.world_events.append(event)  # The scan cache is in use, apply between steps
+        else:
+            handle_world_event(event, self.session.scan_cache, self.session.processed_positions,
+                               self.session.confirmed_blocks)
+        return None
+    
+    def apply_world_events(self):
+        """Apply world changes queued while a step was running."""
+        for event in self.world_events:
+            handle_world_event(event, self.session.scan_cache, self.session.processed_positions,
+                               self.session.confirmed_blocks)
+        self.world_events.clear()
+    
+    def check_mining_task(self):
+        """Forget a finished mining task, re-raising whatever crashed it."""
+        if self.mining_task is not None and self.mining_task.done():
+            task, self.mining_task = self.mining_task, None
+            task.result()
+    
+    async def start_mining(self):
+        """Start a new scan session, stopping the current one first."""
+        await self.stop_mining()
+        await asyncio.to_thread(self.session.reset)
+        self.mining_task = asyncio.create_task(self.mine())
+        # Wake the event loop when mining ends so errors surface right away
+        self.mining_task.add_done_callback(lambda task: self.inbox.put_nowait(None))
+    
+    async def stop_mining(self):
+        """Stop the mining loop; the running step releases its keys before it returns."""
+        if self.mining_task is None:
+            return
+        _cancel_mining.set()
+        try:
+            await self.mining_task
+        finally:
+            _cancel_mining.clear()
+            self.mining_task = None
+    
+    async def step(self, function, *args, **kwargs):
+        """Run one blocking mining step in a worker thread."""
+        check_cancelled()
+        self.apply_world_events()
+        return await asyncio.to_thread(function, *args, **kwargs)
+    
+    async def steps_together(self, *steps):
+        """
+        Run steps in parallel worker threads. Returns their results once all of
+        them finished, even if one failed, so no step outlives the mining loop.
+        """
+        results = await asyncio.gather(*steps, return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+    
+    async def mine(self):
+        """Scan, rotate and break until no blocks are left or the controller stops it."""
+        session = self.session
+        try:
+            while True:
+                METRICS.maybe_flush()
+                LOG.maybe_summarize()
+                
+                # Check for exit condition before processing
+                screen = await self.step(minescript.screen_name)
+                if screen is not None:
+                    self.inbox.put_nowait(SimpleNamespace(type="screen", screen=screen))
+                    return
+                
+                block_info = await self.step(session.next_block)
+                
+                if block_info is None and CONFIG['walk_to_clusters'] and await self.step(session.walk_to_next_cluster):
+                    continue  # Scan again at the new position
+                
+                if block_info is None:
+                    LOG.info(f"✓ No more unprocessed blocks found!")
+                    LOG.info(f"Total blocks processed in this session: {self.total_blocks_processed}")
+                    LOG.info(f"Press '{self.rescan_key_name}' to start new scan session or open GUI to exit")
+                    self.total_blocks_processed = 0
+                    return
+                
+                x, y, z = block_info['position']
+                distance = block_info['distance']
+                full_type = block_info.get('full_type', CONFIG['target_block'])
+                
+                LOG.debug(f"[{session.remaining} remaining] Looking at {full_type} at ({x}, {y}, {z}) - {distance:.1f}m away", 'block')
+                
+                if CONFIG['sweep_breaking'] and CONFIG['break_blocks']:
+                    await self.sweep(block_info)
+                
+                # Smooth look with configured duration and steps
+                with METRICS.phase('rotate'):
+                    rotation = self.step(smooth_look_at, block_aim_point(block_info),
+                                         duration=CONFIG['rotation_duration'], steps=CONFIG['rotation_steps'])
+                    if CONFIG['prefetch_scan']:
+                        # Nothing else uses the scan cache while the camera turns
+                        session.camera_orientation, _ = await self.steps_together(
+                            rotation, self.step(session.prefetch, block_info))
+                    else:
+                        session.camera_orientation = await rotation
+                
+                new_type = None
+                if CONFIG['break_blocks']:
+                    new_type = await self.step(self.break_block, block_info)
+                
+                # Mark this block as processed
+                session.mark_processed(block_info['position'], new_type)
+                self.total_blocks_processed += 1
+                METRICS.count('blocks_processed')
+                await self.step(session.save)
+                
+                # Pause before next scan/block (rotation starts right away when pipelined)
+                if not CONFIG['pipeline_mining']:
+                    with METRICS.phase('fixed_sleeps'):
+                        if CONFIG['prefetch_scan']:
+                            # Next target is ready when the cooldown ends
+                            await self.steps_together(self.step(time.sleep, CONFIG['block_cooldown']),
+                                                      self.step(session.plan_ahead))
+                        else:
+                            await self.step(time.sleep, CONFIG['block_cooldown'])
+                
+                # Loop continues, will rescan automatically for next block
+        except MiningCancelled:
+            pass  # Stopped by a new scan session or an opened GUI
+        finally:
+            self.apply_world_events()
+    
+    async def sweep(self, block_info):
+        """Break the planned targets the crosshair crosses on the way to block_info."""
+        session = self.session
+        for sweep_block, point in await self.step(session.sweep_targets, block_info):
+            position = sweep_block['position']
+            LOG.debug(f"  Breaking {sweep_block['full_type']} at {position} on the way", 'sweep')
+            with METRICS.phase('rotate'):
+                session.camera_orientation = await self.step(
+                    smooth_look_at, point, duration=CONFIG['rotation_duration'], steps=CONFIG['rotation_steps'])
+            with METRICS.phase('break'):
+                new_type = await self.step(break_block_at_position, *position, sweep_block['full_type'])
+            if new_type is None:
+                continue  # Stays in the plan, visited normally later
             
-            # Loop continues, will rescan automatically for next block
+            session.remove_from_plan(position)
+            session.mark_processed(position, new_type)
+            self.total_blocks_processed += 1
+            METRICS.count('blocks_processed')
+            METRICS.count('blocks_broken')
+            METRICS.count('sweep_breaks')
+    
+    def break_block(self, block_info):
+        """Break the targeted block (runs in the worker thread, see mine)."""
+        x, y, z = block_info['position']
+        full_type = block_info.get('full_type', CONFIG['target_block'])
+        if CONFIG['pipeline_mining']:
+            # Take the next target off the plan while this block breaks (only
+            # the cached plan: a scan here would keep attack held past the
+            # break); the confirmed result goes straight into the scan cache
+            self.session.processed_positions.add(block_info['position'])
+            with METRICS.phase('break'):
+                new_type = break_block_at_position(x, y, z, full_type,
+                                                   while_breaking=self.session.take_next_planned)
+        else:
+            if CONFIG['break_delay'] > 0:
+                with METRICS.phase('fixed_sleeps'):
+                    time.sleep(CONFIG['break_delay'])
+            with METRICS.phase('break'):
+                new_type = break_block_at_position(x, y, z, full_type)
+        METRICS.count('blocks_broken' if new_type is not None else 'breaks_failed')
+        return new_type
+
+def main():
+    """Main function to find and look at all target blocks sequentially."""
+    global minescript
     
+    # Count every minescript call for the metrics summaries
+    if not isinstance(minescript, _CountedModule):
+        minescript = METRICS.count_calls(minescript)
+    METRICS.configure(CONFIG['metrics_file'], CONFIG['metrics_interval'])
+    LOG.configure(CONFIG['log_level'], CONFIG['log_file'], CONFIG['log_summary_interval'],
+                  CONFIG['log_max_per_second'])
+    
+    if (CONFIG['sync_rotation_to_render']
+            and not hasattr(minescript.EventQueue, 'register_render_listener')):
+        LOG.warning("✗ This Minescript version has no render events, "
+                    "rotating on a timer instead")
+        CONFIG['sync_rotation_to_render'] = False
+    
+    LOG.info("=== Smooth Block Camera ===")
+    target_matcher = BlockMatcher(CONFIG['target_block'], CONFIG['ignore_block_state'])
+    LOG.info(f"Target: {target_matcher.describe()}")
+    LOG.info(f"Config: distance={CONFIG['search_distance']}m, " +
+             f"speed={CONFIG['rotation_duration']}s, " +
+             f"cooldown={CONFIG['block_cooldown']}s, " +
+             f"cluster_mode={CONFIG['use_cluster_mode']}, " +
+             f"break_blocks={CONFIG['break_blocks']}, " +
+             f"ignore_state={CONFIG['ignore_block_state']}")
+    
+    # Get key name for display
+    key_names = {89: 'Y', 82: 'R', 71: 'G', 84: 'T'}
+    rescan_key_name = key_names.get(CONFIG['rescan_key'], f"key {CONFIG['rescan_key']}")
+    LOG.info(f"\nPress '{rescan_key_name}' to start scanning | Open any GUI to exit")
+    
+    session = MiningSession(target_matcher)
+    if CONFIG['disk_cache_dir']:
+        world = minescript.world_info()
+        session.disk_cache = DiskScanCache(CONFIG['disk_cache_dir'], f"{world.address}_{world.name}",
+                                           CONFIG['disk_cache_max_age'])
+    
+    # Setup event queue for key and world change events
+    event_queue = minescript.EventQueue()
+    event_queue.register_key_listener()
+    if CONFIG['listen_world_changes']:
+        event_queue.register_block_update_listener()
+        event_queue.register_chunk_listener()
+    
+    controller = MiningController(session, event_queue, rescan_key_name)
+    try:
+        asyncio.run(controller.run())
     finally:
-        minescript.echo(f"✓ Script ended. Total blocks processed: {total_blocks_processed}")
+        session.save(force=True)
+        METRICS.flush()
+        LOG.info(f"✓ Script ended. Total blocks processed: {controller.total_blocks_processed}")
+        LOG.echo_recent()
+        LOG.summarize()
 
 
 # Run the script
@@ -0,0 +1,413 @@
+# Throughput benchmark for the macros in this repository, run outside Minecraft.
+# Uses the headless minescript stand-in next to this file (bench/minescript.py).
+#
+# Usage:
+#   python bench/benchmark.py                          - Run every scenario
+#   python bench/benchmark.py --scenario mining-cave   - Run one scenario
+#   python bench/benchmark.py --set rotation_duration=0.5 --set pipeline_mining=True
+#   python bench/benchmark.py --latency 0.005 --json results.json
+#   python bench/benchmark.py --without-listener render  - Act like an older Minescript
+#
+# Reports blocks per minute / rows per hour, minescript calls per unit of work
+# and the (simulated) time spent in each phase of the macro.
+
+import argparse
+import ast
+import importlib
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# The stand-in must shadow any real minescript module
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(1, REPO_DIR)
+
+import minescript  # noqa: E402  (bench/minescript.py)
+
+SIM = minescript.SIM
+
+# Functions timed as phases in each macro (missing ones are skipped)
+MINING_PHASES = [
+    'find_all_blocks', 'sort_blocks_by_viewing_order', 'patch_visit_plan',
+    'smooth_look_at', 'break_block_at_position', 'walk_to',
+]
+FARM_PHASES = ['move_direction', 'move_forward_blocks', 'random_pause', 'travel', 'wait']
+
+
+class PhaseTimer:
+    """
+    Attributes simulated time to named phases. Nested phases are exclusive:
+    time inside an inner phase is not counted for the outer one.
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.totals = {}
+        self.counts = {}
+        self.stack = []  # [name, start time] of active phases
+        self.started = clock.perf_counter()
+
+    def enter(self, name):
+        now = self.clock.perf_counter()
+        if self.stack:
+            self._charge(self.stack[-1], now)
+        self.stack.append([name, now])
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def exit(self):
+        now = self.clock.perf_counter()
+        self._charge(self.stack.pop(), now)
+        if self.stack:
+            self.stack[-1][1] = now
+
+    def _charge(self, frame, now):
+        self.totals[frame[0]] = self.totals.get(frame[0], 0.0) + now - frame[1]
+        frame[1] = now
+
+    def wrap(self, owner, name):
+        """Replace owner.name with a version that is timed as phase name."""
+        function = getattr(owner, name, None)
+        if function is None:
+            return
+
+        def timed(*args, **kwargs):
+            self.enter(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.exit()
+
+        setattr(owner, name, timed)
+
+    def report(self):
+        total = self.clock.perf_counter() - self.started
+        phases = dict(self.totals)
+        phases['other'] = max(0.0, total - sum(phases.values()))
+        return {name: {'seconds': seconds, 'share': seconds / total if total else 0.0,
+                       'calls': self.counts.get(name, 0)}
+                for name, seconds in sorted(phases.items(), key=lambda item: -item[1])}
+
+
+class TimedClock:
+    """
+    Wraps the virtual clock so sleeps outside of any timed phase (fixed
+    cooldowns and waits in the main loop) show up as their own phase.
+    """
+
+    def __init__(self, clock, timer):
+        self._clock = clock
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._clock, name)
+
+    def sleep(self, seconds):
+        if self._timer.stack:
+            # Part of the enclosing phase (e.g. rotation steps)
+            self._clock.sleep(seconds)
+            return
+        self._timer.enter('sleep')
+        try:
+            self._clock.sleep(seconds)
+        finally:
+            self._timer.exit()
+
+
+def load_macro(name, timer, phases, overrides):
+    """Import (or re-import) a macro with fresh state, virtual time and timed phases."""
+    module = importlib.reload(sys.modules[name]) if name in sys.modules else importlib.import_module(name)
+    module.time = TimedClock(SIM.clock, timer)
+    module.CONFIG.update(overrides)
+    for phase in phases:
+        timer.wrap(module, phase)
+        if hasattr(module, 'FarmAutomation'):
+            timer.wrap(module.FarmAutomation, phase)
+    return module
+
+
+# ============================================
+# SCENARIOS
+# ============================================
+
+def build_mining_cluster(rng):
+    """Floating cluster of iron blocks around the player, standing on a stone floor."""
+    for x in range(-7, 8):
+        for z in range(-7, 8):
+            SIM.world[(x, 63, z)] = 'minecraft:stone'
+    cells = [(x, y, z) for x in range(-4, 5) for y in range(64, 69) for z in range(-4, 5)
+             if 2.0 <= math.dist((x + 0.5, y + 0.5, z + 0.5), (0.5, 65.6, 0.5)) <= 4.3]
+    for position in rng.sample(cells, 40):
+        SIM.world[position] = 'minecraft:iron_block'
+    return {'target_block': 'minecraft:iron_block'}
+
+
+def build_mining_cave(rng):
+    """Player in a small cave, ores in the stone around it (many of them buried)."""
+    for x in range(-8, 9):
+        for y in range(56, 74):
+            for z in range(-8, 9):
+                # Air pocket above the floor the player stands on
+                if y >= 64 and math.dist((x + 0.5, y + 0.5, z + 0.5), (0.5, 65.0, 0.5)) <= 2.6:
+                    continue
+                roll = rng.random()
+                if roll < 0.04:
+                    SIM.world[(x, y, z)] = 'minecraft:diamond_ore'
+                elif roll < 0.14:
+                    SIM.world[(x, y, z)] = 'minecraft:iron_ore'
+                else:
+                    SIM.world[(x, y, z)] = 'minecraft:stone'
+    return {'target_block': {'minecraft:diamond_ore': 2, 'minecraft:iron_ore': 1}}
+
+
+def build_mining_region(rng):
+    """Several iron block clusters spread over a flat area, walk_to_clusters on."""
+    for x in range(-40, 41):
+        for z in range(-40, 41):
+            SIM.world[(x, 63, z)] = 'minecraft:stone'
+    for cx, cz in ((18, 6), (-14, 22), (3, -28)):
+        cells = [(cx + dx, 64 + dy, cz + dz) for dx in range(-2, 3) for dy in range(3) for dz in range(-2, 3)]
+        for position in rng.sample(cells, 12):
+            SIM.world[position] = 'minecraft:iron_block'
+    return {'target_block': 'minecraft:iron_block', 'walk_to_clusters': True}
+
+
+def build_farm(rng, width=16, rows=8, forward_blocks=4, mature_share=1.0, regrowing_rows=0.0, y=64):
+    """
+    Serpentine farm: rows run along X between two walls, the player starts in
+    the first row facing +Z (so "right" is -X). A share of the rows (regrowing_rows)
+    has no mature crops at all. y is the height the crops (and the player's feet) are at.
+    """
+    length = rows * forward_blocks
+    regrowing = {z for z in range(length) if z % forward_blocks == 0 and rng.random() < regrowing_rows}
+    for z in range(-1, length + 1):
+        for x in range(-width, 2):
+            SIM.world[(x, y - 1, z)] = 'minecraft:farmland'
+            if x in (-width, 1) or z in (-1, length):
+                SIM.world[(x, y, z)] = 'minecraft:stone'
+                SIM.world[(x, y + 1, z)] = 'minecraft:stone'
+            else:
+                mature = z not in regrowing and rng.random() < mature_share
+                age = 7 if mature else rng.randint(0, 6)
+                SIM.world[(x, y, z)] = f'minecraft:wheat[age={age}]'
+    return {
+        'forward_blocks': forward_blocks,
+        'max_iterations': rows,
+        'farm_bounds': ((-width + 1, 0), (0, length - 1)),  # Only used with prescan_crops
+    }
+
+
+def build_stacked_farm(rng, regrow_seconds=240.0):
+    """
+    Two farms like build_farm stacked 6 blocks apart, with gravity and regrowing
+    crops. A gap in the east walls at z=0 leads to a ladder up (x=3) and, on the
+    upper layer, a hole down (x=2, z=2).
+    """
+    config = build_farm(rng)
+    build_farm(rng, y=70)
+    SIM.gravity = True
+    SIM.crop_regrow_seconds = regrow_seconds
+
+    for y in (64, 65, 70, 71):
+        SIM.world.pop((1, y, 0))  # Gaps in the east walls
+    for position in ((2, 63, 0), (2, 63, 1), (2, 63, 2), (3, 63, 0), (2, 69, 0), (2, 69, 1)):
+        SIM.world[position] = 'minecraft:stone'  # Floors east of the farms (a hole at (2, 69, 2))
+    for y in range(64, 70):
+        SIM.world[(3, y, 0)] = 'minecraft:ladder'
+    for y in range(64, 72):
+        SIM.world[(4, y, 0)] = 'minecraft:stone'  # Wall behind the ladder
+
+    plots = {
+        'plots': [{
+            'name': 'field', 'start': [0, 64, 0], 'yaw': 0, 'bounds': list(config['farm_bounds']),
+            'layers': [64, 70], 'forward_blocks': config['forward_blocks'], 'regrow_seconds': regrow_seconds,
+        }],
+        'transitions': [
+            {'from': 'field@64', 'to': 'field@70',
+             'path': [[0.5, 64, 0.5], [2.5, 64, 0.5], [3.5, 70, 0.5], [2.5, 70, 0.5]]},
+            {'from': 'field@70', 'to': 'field@64',
+             'path': [[0.5, 70, 0.5], [2.5, 70, 0.5], [2.5, 64, 2.5], [2.5, 64, 0.5]]},
+        ],
+    }
+    path = os.path.join(tempfile.mkdtemp(), 'plots.json')
+    with open(path, 'w') as f:
+        json.dump(plots, f)
+    config['plots_file'] = path
+    config['max_iterations'] = 6 * config['max_iterations']  # Three visits per layer
+    return config
+
+
+def run_mining(build, args, overrides):
+    rng = random.Random(args.seed)
+    SIM.reset(args.latency, args.block_latency)
+    config = build(rng)
+    config.update(overrides)
+    timer = PhaseTimer(SIM.clock)
+    module = load_macro('SmoothLookAutoMining', timer, MINING_PHASES, config)
+
+    # Finish once nothing was broken for a while (the macro waits for a key then),
+    # not counting time spent walking to the next cluster
+    idle_timeout = args.idle_timeout
+    if module.CONFIG['walk_to_clusters']:
+        idle_timeout += module.CONFIG['max_walk_time']
+
+    def finished(sim):
+        last = sim.last_break_time or sim.start_time
+        return sim.now() - last > idle_timeout or sim.now() - sim.start_time > args.time_limit
+
+    SIM.stop_condition = finished
+    SIM.schedule_key(module.CONFIG['rescan_key'])
+    module.main()
+
+    blocks = sum(SIM.broken.values())
+    elapsed = (SIM.last_break_time or SIM.now()) - SIM.start_time
+    return {
+        'blocks': blocks,
+        'seconds': elapsed,
+        'blocks_per_minute': blocks / elapsed * 60 if elapsed else 0.0,
+        'broken': dict(SIM.broken),
+        'calls': dict(SIM.calls),
+        'calls_per_block': {name: count / blocks for name, count in SIM.calls.items()} if blocks else {},
+        'phases': timer.report(),
+    }
+
+
+def run_mining_disk_cache(args, overrides):
+    """
+    mining-cluster with the disk cache on (and world listeners, as by default).
+    Checks that the saved processed positions are exactly the confirmed breaks.
+    """
+    directory = tempfile.mkdtemp()
+    result = run_mining(build_mining_cluster, args, {**overrides, 'disk_cache_dir': directory})
+    module = sys.modules['SmoothLookAutoMining']
+    world = minescript.world_info()
+    saved = {}
+    module.DiskScanCache(directory, f"{world.address}_{world.name}", float('inf')).load_into(
+        module.ScanCache(), saved)
+    if set(saved) != SIM.broken_positions:
+        raise AssertionError(f"disk cache holds {len(saved)} processed position(s), "
+                             f"{len(SIM.broken_positions)} block(s) were broken "
+                             f"({len(set(saved) ^ SIM.broken_positions)} differ)")
+    return result
+
+
+def run_farm(args, overrides, build=build_farm, **options):
+    rng = random.Random(args.seed)
+    random.seed(args.seed)  # The farm macro's humanization uses the random module
+    SIM.reset(args.latency, args.block_latency)
+    config = build(rng, **options)
+    config['checkpoint_file'] = os.path.join(tempfile.mkdtemp(), 'farm_checkpoint.json')
+    config.update(overrides)
+    timer = PhaseTimer(SIM.clock)
+    module = load_macro('PatternFarmAutomation', timer, FARM_PHASES, config)
+
+    SIM.stop_condition = lambda sim: sim.now() - sim.start_time > args.time_limit
+    automation = module.FarmAutomation()
+    automation.run()
+
+    rows = automation.iterations
+    elapsed = SIM.now() - SIM.start_time
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_hour': rows / elapsed * 3600 if elapsed else 0.0,
+        'harvested': SIM.harvested,
+        'harvested_per_hour': SIM.harvested / elapsed * 3600 if elapsed else 0.0,
+        'trampled': SIM.trampled,
+        'calls': dict(SIM.calls),
+        'calls_per_row': {name: count / rows for name, count in SIM.calls.items()} if rows else {},
+        'phases': timer.report(),
+    }
+
+
+SCENARIOS = {
+    'mining-cluster': lambda args, overrides: run_mining(build_mining_cluster, args, overrides),
+    'mining-cave': lambda args, overrides: run_mining(build_mining_cave, args, overrides),
+    'mining-region': lambda args, overrides: run_mining(build_mining_region, args, overrides),
+    'mining-disk-cache': run_mining_disk_cache,
+    'farm': lambda args, overrides: run_farm(args, overrides),
+    'farm-partial': lambda args, overrides: run_farm(args, overrides, mature_share=0.3),
+    'farm-regrowing': lambda args, overrides: run_farm(args, overrides, mature_share=0.8, regrowing_rows=0.5),
+    'farm-stacked': lambda args, overrides: run_farm(args, overrides, build=build_stacked_farm),
+}
+
+
+# ============================================
+# COMMAND LINE INTERFACE
+# ============================================
+
+def parse_override(text):
+    """Parse a --set key=value argument (value as a Python literal if possible)."""
+    key, _, value = text.partition('=')
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass  # Plain string
+    return key, value
+
+
+def print_result(name, result):
+    print(f"\n=== {name} ===")
+    if 'blocks' in result:
+        print(f"Blocks broken:     {result['blocks']} in {result['seconds']:.1f}s "
+              f"({result['blocks_per_minute']:.1f} blocks/min)")
+        per_unit, unit = result['calls_per_block'], 'block'
+    else:
+        print(f"Rows:              {result['rows']} in {result['seconds']:.1f}s "
+              f"({result['rows_per_hour']:.0f} rows/hour)")
+        print(f"Crops harvested:   {result['harvested']} ({result['harvested_per_hour']:.0f}/hour, "
+              f"trampled immature: {result['trampled']})")
+        per_unit, unit = result['calls_per_row'], 'row'
+
+    print(f"minescript calls per {unit}:")
+    for call, count in sorted(per_unit.items(), key=lambda item: -item[1]):
+        print(f"  {call:<32} {count:10.1f}")
+
+    print("Time per phase:")
+    for phase, info in result['phases'].items():
+        print(f"  {phase:<32} {info['seconds']:8.2f}s {info['share'] * 100:5.1f}%  ({info['calls']} calls)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the macros against a simulated world")
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), action='append',
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument('--set', dest='overrides', action='append', default=[], metavar='KEY=VALUE',
+                        help="Override a CONFIG entry of the macro")
+    parser.add_argument('--latency', type=float, default=0.002, help="Seconds per minescript call")
+    parser.add_argument('--block-latency', type=float, default=0.00001,
+                        help="Extra seconds per position in getblocklist")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--idle-timeout', type=float, default=5.0,
+                        help="Mining ends after this many seconds without a broken block")
+    parser.add_argument('--time-limit', type=float, default=1800.0, help="Simulated seconds per scenario")
+    parser.add_argument('--json', help="Also write the results to this file")
+    parser.add_argument('--without-listener', action='append', default=[], metavar='EVENT',
+                        help="Leave out EventQueue.register_EVENT_listener (repeatable)")
+    args = parser.parse_args()
+
+    for event in args.without_listener:
+        delattr(minescript.EventQueue, f'register_{event}_listener')
+
+    overrides = dict(parse_override(text) for text in args.overrides)
+    results = {}
+    for name in args.scenario or sorted(SCENARIOS):
+        # Only pass overrides to the macro they belong to
+        module_name = 'PatternFarmAutomation' if name.startswith('farm') else 'SmoothLookAutoMining'
+        module = importlib.import_module(module_name)
+        scenario_overrides = {key: value for key, value in overrides.items() if key in module.CONFIG}
+        results[name] = SCENARIOS[name](args, scenario_overrides)
+        print_result(name, results[name])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,523 @@
+# Headless stand-in for the minescript module, used by bench/benchmark.py.
+# Simulates a small voxel world, the player (position, orientation, movement keys,
+# attacking), getblocklist and EventQueue, with configurable latency per call.
+# Not a full Minescript implementation: only what the macros in this repository use.
+#
+# Time is virtual: the benchmark points the macros' `time` module at SIM.clock, so
+# sleeps and call latency advance the simulation instantly instead of waiting.
+
+import math
+import queue
+import threading
+import time as _real_time
+from collections import Counter, deque
+from types import SimpleNamespace
+
+# Blocks that don't stop the player or the crosshair
+NON_SOLID_BLOCKS = {
+    'minecraft:air', 'minecraft:cave_air', 'minecraft:void_air',
+    'minecraft:water', 'minecraft:lava',
+}
+
+# Crops: walk-through, harvested by attacking while walking over them
+CROP_MAX_AGE = {
+    'minecraft:wheat': 7, 'minecraft:carrots': 7, 'minecraft:potatoes': 7,
+    'minecraft:beetroots': 3, 'minecraft:nether_wart': 3,
+}
+
+# Seconds of attacking needed to break a block (roughly, with a fitting tool)
+BREAK_TIMES = {
+    'minecraft:stone': 0.4,
+    'minecraft:iron_block': 0.95,
+    'minecraft:gold_block': 0.6,
+    'minecraft:diamond_block': 1.25,
+    'minecraft:iron_ore': 0.75,
+    'minecraft:gold_ore': 0.75,
+    'minecraft:diamond_ore': 0.75,
+    'minecraft:coal_ore': 0.6,
+}
+DEFAULT_BREAK_TIME = 0.5
+
+EYE_HEIGHT = 1.62
+PLAYER_HALF_WIDTH = 0.3
+WALK_SPEED = 4.317  # blocks per second
+SPRINT_SPEED = 5.612
+CLIMB_SPEED = 2.35  # blocks per second up a ladder
+FALL_SPEED = 20.0  # blocks per second (constant, no acceleration)
+TICK = 0.05  # seconds per game tick
+FRAME = 1 / 60  # seconds per rendered frame
+DRIVER_TIMEOUT = 0.05  # Real seconds a thread counts as driving the clock after advancing it
+
+
+def base_name(block_type):
+    return block_type.partition('[')[0]
+
+
+def block_age(block_type):
+    """Get the age property of a block string (0 if it has none)."""
+    _, _, state = block_type.partition('[')
+    for prop in state.rstrip(']').split(','):
+        key, _, value = prop.partition('=')
+        if key == 'age':
+            return int(value)
+    return 0
+
+
+class VirtualClock:
+    """
+    Clock with the parts of the `time` module the macros use.
+    Runs at real speed while code computes and jumps ahead on sleep,
+    so CPU time spent in the macros is still measured.
+    """
+
+    def __init__(self, simulator):
+        self.simulator = simulator
+        self.offset = 0.0
+        self.lock = threading.RLock()
+        self.last_advance = {}  # Thread id -> real time it last advanced the clock
+
+    def perf_counter(self):
+        return _real_time.perf_counter() + self.offset
+
+    monotonic = perf_counter
+
+    def time(self):
+        return self.perf_counter()
+
+    strftime = staticmethod(_real_time.strftime)  # Log timestamps, wall clock is fine
+
+    def advance(self, seconds):
+        """Skip ahead in virtual time and let the world catch up."""
+        with self.lock:
+            self.last_advance[threading.get_ident()] = _real_time.perf_counter()
+            if seconds > 0:
+                self.offset += seconds
+            self.simulator.update()
+        self.simulator.yield_to_listeners()
+
+    def driven_elsewhere(self):
+        """True if another thread advanced the clock just now (it is busy in the macro)."""
+        now = _real_time.perf_counter()
+        current = threading.get_ident()
+        return any(thread != current and now - when < DRIVER_TIMEOUT
+                   for thread, when in list(self.last_advance.items()))
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+
+class Simulator:
+    """World, player and call accounting behind the module-level functions."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, call_latency=0.002, block_latency=0.00001):
+        self.clock = VirtualClock(self)
+        self.call_latency = call_latency  # Seconds per call
+        self.block_latency = block_latency  # Extra seconds per position in getblocklist
+        self.world = {}  # (x, y, z) -> block type, missing = air
+        self.position = [0.5, 64.0, 0.5]
+        self.orientation = [0.0, 0.0]
+        self.pressed = set()
+        self.screen = None
+        self.calls = Counter()
+        self.queues = []
+        self.scheduled_keys = []  # (time, key) presses not delivered yet
+        self.broken = Counter()  # Block types broken by the player
+        self.broken_positions = set()  # Positions of the blocks broken by the player
+        self.harvested = 0  # Mature crops harvested
+        self.trampled = 0  # Immature crops broken
+        self.break_progress = (None, 0.0)  # (position, seconds attacked)
+        self.last_cell = None  # Cell the player's feet were in after the last move
+        self.last_break_time = None
+        self.start_time = self.clock.perf_counter()
+        self.last_update = self.start_time
+        self.next_tick = self.start_time + TICK
+        self.next_frame = self.start_time + FRAME
+        self.stop_condition = None  # Callable returning True to open a "GUI"
+        self.gravity = False  # Fall when nothing is below the player (off: everything floats)
+        self.crop_regrow_seconds = None  # Broken crops grow back fully after this long (None = never)
+        self.regrowing = deque()  # (time, cell, crop) of broken crops growing back
+
+    # ----- world -----
+
+    def get(self, position):
+        return self.world.get(tuple(position), 'minecraft:air')
+
+    def set(self, position, block_type):
+        position = tuple(position)
+        old_state = self.get(position)
+        if block_type == 'minecraft:air':
+            self.world.pop(position, None)
+        else:
+            self.world[position] = block_type
+        self.post('block_update', position=list(position), old_state=old_state, new_state=block_type)
+
+    def is_solid(self, position):
+        block_type = base_name(self.get(position))
+        return (block_type not in NON_SOLID_BLOCKS and block_type not in CROP_MAX_AGE
+                and block_type != 'minecraft:ladder')
+
+    def is_ladder(self, position):
+        return base_name(self.get(position)) == 'minecraft:ladder'
+
+    def now(self):
+        return self.clock.perf_counter()
+
+    # ----- events -----
+
+    def post(self, listener, **fields):
+        """Deliver an event to every queue listening for it."""
+        event = None
+        for event_queue in self.queues:
+            if listener in event_queue.listeners:
+                if event is None:
+                    event = SimpleNamespace(type=listener, time=self.now(), **fields)
+                event_queue.queue.put(event)
+
+    def yield_to_listeners(self):
+        """
+        Give threads blocked in EventQueue.get a moment (in real time) to take
+        new events and react before virtual time moves on.
+        """
+        current = threading.get_ident()
+        for event_queue in list(self.queues):
+            if event_queue.waiting - {current} and not event_queue.queue.empty():
+                deadline = _real_time.perf_counter() + DRIVER_TIMEOUT
+                while not event_queue.queue.empty() and _real_time.perf_counter() < deadline:
+                    _real_time.sleep(0.0002)
+                _real_time.sleep(0.002)  # Time to handle it
+
+    def schedule_key(self, key, delay=0.0):
+        """Press and release a key after delay seconds of simulated time."""
+        self.scheduled_keys.append((self.now() + delay, key))
+
+    # ----- simulation -----
+
+    def update(self):
+        """Advance player movement, block breaking and periodic events to now."""
+        now = self.now()
+        while self.last_update < now:
+            dt = min(TICK, now - self.last_update)
+            self.last_update += dt
+            self.step(dt)
+
+        while self.regrowing and self.regrowing[0][0] <= now:
+            _, cell, crop = self.regrowing.popleft()
+            self.set(cell, f"{crop}[age={CROP_MAX_AGE[crop]}]")
+
+        for due, key in list(self.scheduled_keys):
+            if due <= now and any('key' in q.listeners for q in self.queues):
+                self.scheduled_keys.remove((due, key))
+                for action in (1, 0):
+                    self.post('key', key=key, scan_code=0, action=action, modifiers=0, screen=self.screen)
+
+        # Ticks and frames are only generated while someone listens for them
+        while self.next_tick <= now:
+            self.next_tick += TICK
+            self.post('tick')
+        while self.next_frame <= now:
+            self.next_frame += FRAME
+            self.post('render')
+
+        if self.screen is None and self.stop_condition is not None and self.stop_condition(self):
+            self.screen = 'bench:finished'
+
+    def step(self, dt):
+        self.move(dt)
+        if 'attack' in self.pressed:
+            self.attack(dt)
+
+    def move(self, dt):
+        yaw = math.radians(self.orientation[0])
+        forward = (-math.sin(yaw), math.cos(yaw))
+        right = (-math.cos(yaw), -math.sin(yaw))
+
+        move_x = move_z = 0.0
+        for key, direction, sign in (('forward', forward, 1), ('backward', forward, -1),
+                                     ('right', right, 1), ('left', right, -1)):
+            if key in self.pressed:
+                move_x += direction[0] * sign
+                move_z += direction[1] * sign
+        length = math.hypot(move_x, move_z)
+        speed = SPRINT_SPEED if 'sprint' in self.pressed and 'forward' in self.pressed else WALK_SPEED
+        distance = speed * dt / length if length else 0.0  # Still falls without keys
+        # Move each axis separately so the player slides along walls
+        for axis, delta in ((0, move_x * distance), (2, move_z * distance)):
+            if delta == 0:
+                continue
+            new_position = list(self.position)
+            new_position[axis] += delta
+            edge = new_position[axis] + math.copysign(PLAYER_HALF_WIDTH, delta)
+            cell = list(map(math.floor, new_position))
+            cell[axis] = math.floor(edge)
+            if self.is_solid(cell) or self.is_solid((cell[0], cell[1] + 1, cell[2])):
+                continue
+            self.position = new_position
+
+        self.move_vertically(dt)
+
+        cell = tuple(map(math.floor, self.position))
+        if 'attack' in self.pressed and cell != self.last_cell:
+            self.harvest_at(cell)
+        self.last_cell = cell
+
+    def move_vertically(self, dt):
+        """
+        Climb ladders while walking into them and, with gravity on, fall onto the
+        next block below (only the column under the player's center counts).
+        """
+        x, y, z = self.position
+        column = (math.floor(x), math.floor(z))
+        if self.is_ladder((column[0], math.floor(y), column[1])):
+            if 'forward' in self.pressed or 'jump' in self.pressed:
+                new_y = y + CLIMB_SPEED * dt
+                # Climbed out of the top of the ladder: stand on it
+                if not self.is_ladder((column[0], math.floor(new_y), column[1])):
+                    new_y = math.floor(new_y)
+                self.position[1] = new_y
+            return
+        if not self.gravity:
+            return
+
+        def supports(height):
+            """True if the player can stand at height (on top of the block below)."""
+            below = (column[0], height - 1, column[1])
+            return self.is_solid(below) or self.is_ladder(below)
+
+        if y == math.floor(y) and supports(int(y)):
+            return
+        new_y = y - FALL_SPEED * dt
+        for height in range(math.ceil(y) - 1, math.ceil(new_y) - 1, -1):
+            if supports(height):
+                new_y = height
+                break
+        self.position[1] = new_y
+
+    def harvest_at(self, cell):
+        """Break the crop the player walks into (once per cell entered)."""
+        block_type = self.get(cell)
+        max_age = CROP_MAX_AGE.get(base_name(block_type))
+        if max_age is None:
+            return
+        if block_age(block_type) >= max_age:
+            self.harvested += 1
+        else:
+            self.trampled += 1
+        self.set(cell, f"{base_name(block_type)}[age=0]")
+        if self.crop_regrow_seconds is not None:
+            self.regrowing.append((self.now() + self.crop_regrow_seconds, cell, base_name(block_type)))
+
+    def attack(self, dt):
+        target = self.targeted_block(4.5)
+        if target is None:
+            self.break_progress = (None, 0.0)
+            return
+        position, _, _ = target
+        progress_position, progress = self.break_progress
+        progress = progress + dt if progress_position == position else dt
+        block_type = self.get(position)
+        if progress >= BREAK_TIMES.get(base_name(block_type), DEFAULT_BREAK_TIME):
+            self.broken[base_name(block_type)] += 1
+            self.broken_positions.add(tuple(position))
+            self.last_break_time = self.now()
+            self.set(position, 'minecraft:air')
+            progress = 0.0
+        self.break_progress = (position, progress)
+
+    def look_vector(self):
+        yaw, pitch = map(math.radians, self.orientation)
+        return (-math.sin(yaw) * math.cos(pitch), -math.sin(pitch), math.cos(yaw) * math.cos(pitch))
+
+    def targeted_block(self, max_distance):
+        """Raymarch from the eye; returns (position, distance, side) or None."""
+        eye = (self.position[0], self.position[1] + EYE_HEIGHT, self.position[2])
+        direction = self.look_vector()
+        previous = tuple(map(math.floor, eye))
+        distance = 0.0
+        while distance <= max_distance:
+            point = [eye[i] + direction[i] * distance for i in range(3)]
+            cell = tuple(map(math.floor, point))
+            if cell != previous:
+                if base_name(self.get(cell)) not in NON_SOLID_BLOCKS:
+                    side = next(('xyz'[i] for i in range(3) if cell[i] != previous[i]), 'x')
+                    return cell, distance, side
+                previous = cell
+            distance += 0.01
+        return None
+
+    # ----- call accounting -----
+
+    def call(self, name, extra_latency=0.0):
+        """Count a call and charge its latency."""
+        self.calls[name] += 1
+        self.clock.advance(self.call_latency + extra_latency)
+
+
+SIM = Simulator()
+
+
+# ============================================
+# minescript API
+# ============================================
+
+def echo(*messages):
+    SIM.call('echo')
+
+
+def log(*messages):
+    SIM.call('log')
+
+
+def player_position():
+    SIM.call('player_position')
+    return list(SIM.position)
+
+
+def player_orientation():
+    SIM.call('player_orientation')
+    return tuple(SIM.orientation)
+
+
+def player_set_orientation(yaw, pitch):
+    SIM.call('player_set_orientation')
+    SIM.orientation = [yaw, max(-90.0, min(90.0, pitch))]
+    return True
+
+
+def player():
+    SIM.call('player')
+    return SimpleNamespace(name='Bench', position=list(SIM.position),
+                           yaw=SIM.orientation[0], pitch=SIM.orientation[1])
+
+
+def player_get_targeted_block(max_distance=20):
+    SIM.call('player_get_targeted_block')
+    target = SIM.targeted_block(max_distance)
+    if target is None:
+        return None
+    position, distance, side = target
+    return SimpleNamespace(position=list(position), distance=distance, side=side,
+                           type=SIM.get(position))
+
+
+def getblock(x, y, z):
+    SIM.call('getblock')
+    return SIM.get((math.floor(x), math.floor(y), math.floor(z)))
+
+
+def getblocklist(positions):
+    SIM.call('getblocklist', SIM.block_latency * len(positions))
+    SIM.calls['getblocklist_positions'] += len(positions)
+    return [SIM.get(position) for position in positions]
+
+
+def screen_name():
+    SIM.call('screen_name')
+    return SIM.screen
+
+
+def world_info():
+    SIM.call('world_info')
+    return SimpleNamespace(name='Bench World', address='localhost', game_ticks=0, day_ticks=0)
+
+
+def _press(key):
+    def press(pressed):
+        SIM.call(f'player_press_{key}')
+        if pressed:
+            SIM.pressed.add(key)
+        else:
+            SIM.pressed.discard(key)
+            if key == 'attack':
+                SIM.break_progress = (None, 0.0)
+    press.__name__ = f'player_press_{key}'
+    return press
+
+
+player_press_forward = _press('forward')
+player_press_backward = _press('backward')
+player_press_left = _press('left')
+player_press_right = _press('right')
+player_press_jump = _press('jump')
+player_press_sprint = _press('sprint')
+player_press_sneak = _press('sneak')
+player_press_attack = _press('attack')
+player_press_use = _press('use')
+
+
+class EventQueue:
+    """Queue of simulated events, fed by the listeners registered on it."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.listeners = set()
+        self.waiting = set()  # Ids of the threads blocked in get
+        SIM.queues.append(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.unregister_all()
+
+    def _register(self, listener):
+        SIM.call(f'register_{listener}_listener')
+        self.listeners.add(listener)
+
+    def register_key_listener(self):
+        self._register('key')
+
+    def register_block_update_listener(self):
+        self._register('block_update')
+
+    def register_chunk_listener(self):
+        self._register('chunk')
+
+    def register_tick_listener(self):
+        self._register('tick')
+
+    def register_render_listener(self):
+        self._register('render')
+
+    def unregister_all(self):
+        self.listeners.clear()
+        if self in SIM.queues:
+            SIM.queues.remove(self)
+
+    def get(self, block=True, timeout=None):
+        """Like minescript's EventQueue.get: raises queue.Empty if nothing arrives."""
+        try:
+            return self.queue.get(block=False)
+        except queue.Empty:
+            if not block:
+                raise
+
+        # Let simulated time pass until an event shows up. While another thread
+        # drives the clock (a macro waiting for events in a worker thread), wait
+        # for its events instead of skipping time ahead of it
+        start = SIM.now()
+        self.waiting.add(threading.get_ident())
+        try:
+            return self._wait(start, timeout)
+        finally:
+            self.waiting.discard(threading.get_ident())
+
+    def _wait(self, start, timeout):
+        while True:
+            step = TICK if timeout is None else min(TICK, timeout - (SIM.now() - start))
+            if step <= 0:
+                raise queue.Empty
+            if SIM.clock.driven_elsewhere():
+                try:
+                    return self.queue.get(timeout=0.001)
+                except queue.Empty:
+                    continue
+            SIM.clock.advance(step)
+            try:
+                return self.queue.get(block=False)
+            except queue.Empty:
+                pass
+            if SIM.screen is not None and timeout is None:
+                raise queue.Empty  # Benchmark over, nothing will come